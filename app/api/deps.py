@@ -1,10 +1,12 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.auth import is_stateless_token, principal_from_claims, remember_user, user_state_cache
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.core.config import settings
 from app.models.user import User
+from app.repositories.user_repository import AsyncUserRepository
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -12,7 +14,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login
 
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -22,13 +24,26 @@ async def get_current_user(
 
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
         raise credentials_exception
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # Stateless-режим: пользователь собирается из claims, БД — только при промахе кэша
+    if is_stateless_token(payload):
+        state = user_state_cache.get(user_id)
+        if state is None:
+            user = await AsyncUserRepository(db).get_by_id(user_id)
+            if user is None:
+                raise credentials_exception
+            state = remember_user(user)
+
+        principal = principal_from_claims(user_id, payload, state)
+        if principal is None:
+            raise credentials_exception
+        return principal
+
+    # Запрос идёт через asyncpg и не блокирует event loop
+    user = await AsyncUserRepository(db).get_by_id(user_id)
     if user is None:
         raise credentials_exception
 
@@ -40,4 +55,4 @@ async def get_current_active_user(
 ) -> User:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
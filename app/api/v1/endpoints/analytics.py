@@ -1,129 +1,162 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from typing import Optional
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 
+from app.core.analytics_cache import analytics_cache
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.transaction import Transaction
-from app.models.category import Category
 from app.core.dependencies import get_current_user
+from app.models.enums import Bucket, TransactionType
+from app.models.types import money
 from app.models.user import User
+from app.repositories.analytics_repository import AnalyticsRepository
+from app.utils.periods import count_buckets, iter_buckets, next_start, truncate
 
 router = APIRouter()
 
 
+def get_analytics_repository(db: Session = Depends(get_db)) -> AnalyticsRepository:
+    return AnalyticsRepository(db)
+
+
 @router.get("/balance")
 def get_balance(
-        db: Session = Depends(get_db),
+        repository: AnalyticsRepository = Depends(get_analytics_repository),
         current_user: User = Depends(get_current_user)
 ):
-    """Получить текущий баланс (доходы - расходы) — считает в БД"""
-    # Доходы
-    income = db.query(func.coalesce(func.sum(Transaction.amount), 0)) \
-        .join(Category, Transaction.category_id == Category.id) \
-        .filter(
-        Transaction.user_id == current_user.id,
-        Category.type == 'income'
-    ).scalar()
-
-    # Расходы
-    expense = db.query(func.coalesce(func.sum(Transaction.amount), 0)) \
-        .join(Category, Transaction.category_id == Category.id) \
-        .filter(
-        Transaction.user_id == current_user.id,
-        Category.type == 'expense'
-    ).scalar()
-
-    return {
-        "total_income": float(income),
-        "total_expense": float(expense),
-        "balance": float(income - expense)
-    }
+    """Получить текущий баланс (доходы - расходы) — один запрос с SUM ... FILTER"""
+    def compute():
+        income, expense = repository.get_totals(current_user.id)
+        return {
+            "total_income": income,
+            "total_expense": expense,
+            "balance": money(income - expense)
+        }
+
+    return analytics_cache.get_or_compute(current_user.id, "balance", {}, compute)
 
 
 @router.get("/by-category")
 def get_expenses_by_category(
-        db: Session = Depends(get_db),
+        repository: AnalyticsRepository = Depends(get_analytics_repository),
         current_user: User = Depends(get_current_user),
         start_date: Optional[datetime] = Query(None),
         end_date: Optional[datetime] = Query(None)
 ):
-    """Получить расходы по категориям за период — GROUP BY в БД"""
-    query = db.query(
-        Category.name,
-        func.coalesce(func.sum(Transaction.amount), 0).label('total')
-    ).join(
-        Transaction, Transaction.category_id == Category.id
-    ).filter(
-        Transaction.user_id == current_user.id,
-        Category.type == "expense"
-    )
-
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
+    """Получить расходы по категориям за период — GROUP BY в БД (без периода — из месячной свёртки)"""
+    def compute():
+        if settings.ANALYTICS_USE_ROLLUP and start_date is None and end_date is None:
+            results = repository.get_expenses_by_category_from_rollup(current_user.id)
+        else:
+            results = repository.get_expenses_by_category(current_user.id, start_date, end_date)
+        return [{"category": name, "total": total} for name, total in results]
 
-    results = query.group_by(Category.name).all()
-
-    return [{"category": r[0], "total": float(r[1])} for r in results]
+    params = {"start_date": start_date, "end_date": end_date}
+    return analytics_cache.get_or_compute(current_user.id, "by-category", params, compute)
 
 
 @router.get("/monthly/{year}/{month}")
 def get_monthly_stats(
-        year: int,
-        month: int,
-        db: Session = Depends(get_db),
+        year: int = Path(..., ge=1, le=9999),
+        month: int = Path(..., ge=1, le=12),
+        repository: AnalyticsRepository = Depends(get_analytics_repository),
         current_user: User = Depends(get_current_user)
 ):
-    """Получить статистику за конкретный месяц — агрегация в БД"""
+    """Получить статистику за конкретный месяц — доходы, расходы и категории одним запросом"""
     # Формируем границы месяца
-    start_date = datetime(year, month, 1, tzinfo=timezone.utc)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
-    else:
-        end_date = datetime(year, month + 1, 1, tzinfo=timezone.utc)
-
-    # Доходы за месяц
-    income = db.query(func.coalesce(func.sum(Transaction.amount), 0)) \
-        .join(Category, Transaction.category_id == Category.id) \
-        .filter(
-        Transaction.user_id == current_user.id,
-        Category.type == 'income',
-        Transaction.date >= start_date,
-        Transaction.date < end_date
-    ).scalar()
-
-    # Расходы за месяц
-    expense = db.query(func.coalesce(func.sum(Transaction.amount), 0)) \
-        .join(Category, Transaction.category_id == Category.id) \
-        .filter(
-        Transaction.user_id == current_user.id,
-        Category.type == 'expense',
-        Transaction.date >= start_date,
-        Transaction.date < end_date
-    ).scalar()
-
-    # Расходы по категориям (группировка в БД)
-    by_category_raw = db.query(
-        Category.name,
-        func.coalesce(func.sum(Transaction.amount), 0).label('total')
-    ).join(
-        Transaction, Transaction.category_id == Category.id
-    ).filter(
-        Transaction.user_id == current_user.id,
-        Category.type == 'expense',
-        Transaction.date >= start_date,
-        Transaction.date < end_date
-    ).group_by(Category.name).all()
-
-    by_category = {r[0]: float(r[1]) for r in by_category_raw}
-
-    return {
-        "month": f"{year}-{month:02d}",
-        "income": float(income),
-        "expense": float(expense),
-        "balance": float(income - expense),
-        "by_category": by_category
-    }
\ No newline at end of file
+    first = date(year, month, 1)
+    try:
+        stop = next_start(first, Bucket.MONTH)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Month is out of range")
+
+    def compute():
+        if settings.ANALYTICS_USE_ROLLUP:
+            income, expense, by_category = repository.get_month_from_rollup(current_user.id, first)
+        else:
+            income, expense, by_category = repository.get_totals_with_categories(
+                current_user.id,
+                datetime(first.year, first.month, first.day, tzinfo=timezone.utc),
+                datetime(stop.year, stop.month, stop.day, tzinfo=timezone.utc)
+            )
+
+        return {
+            "month": f"{year}-{month:02d}",
+            "income": income,
+            "expense": expense,
+            "balance": money(income - expense),
+            "by_category": by_category
+        }
+
+    return analytics_cache.get_or_compute(current_user.id, "monthly", {"year": year, "month": month}, compute)
+
+
+@router.get("/timeseries")
+def get_timeseries(
+        start_date: date = Query(...),
+        end_date: date = Query(...),
+        bucket: Bucket = Query(Bucket.MONTH),
+        by_category: bool = Query(False),
+        repository: AnalyticsRepository = Depends(get_analytics_repository),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Доходы, расходы и баланс по интервалам (день/неделя/месяц/квартал/год) одним запросом.
+    Границы расширяются до целых интервалов, пустые интервалы заполняются нулями.
+    by_category=true добавляет расходы по категориям в каждую точку.
+    """
+    if start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+    if count_buckets(start_date, end_date, bucket) > settings.ANALYTICS_TIMESERIES_MAX_POINTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many points, at most {settings.ANALYTICS_TIMESERIES_MAX_POINTS} allowed"
+        )
+    first = truncate(start_date, bucket)
+    try:
+        stop = next_start(truncate(end_date, bucket), bucket)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="end_date is out of range")
+
+    def compute():
+
+        if settings.ANALYTICS_USE_ROLLUP and bucket in (Bucket.MONTH, Bucket.QUARTER, Bucket.YEAR):
+            rows = repository.get_timeseries_from_rollup(current_user.id, bucket, first, stop, by_category)
+        else:
+            rows = repository.get_timeseries(
+                current_user.id, bucket,
+                datetime(first.year, first.month, first.day, tzinfo=timezone.utc),
+                datetime(stop.year, stop.month, stop.day, tzinfo=timezone.utc),
+                by_category
+            )
+
+        points = {}
+        for period in iter_buckets(start_date, end_date, bucket):
+            point = {"period": period.isoformat(), "income": 0.0, "expense": 0.0, "balance": 0.0}
+            if by_category:
+                point["by_category"] = {}
+            points[period] = point
+
+        for period, name, type, total in rows:
+            point = points[period]
+            if type == TransactionType.INCOME:
+                point["income"] += total
+            else:
+                point["expense"] += total
+                if by_category:
+                    point["by_category"][name] = point["by_category"].get(name, 0.0) + total
+
+        for point in points.values():
+            point["income"], point["expense"] = money(point["income"]), money(point["expense"])
+            point["balance"] = money(point["income"] - point["expense"])
+            if by_category:
+                point["by_category"] = {name: money(total) for name, total in point["by_category"].items()}
+
+        return {"bucket": bucket.value, "points": list(points.values())}
+
+    params = {"start_date": start_date, "end_date": end_date, "bucket": bucket.value, "by_category": by_category}
+    return analytics_cache.get_or_compute(current_user.id, "timeseries", params, compute)
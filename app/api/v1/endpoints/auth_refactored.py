@@ -2,6 +2,8 @@ from fastapi import APIRouter, Depends
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.dependencies import get_current_user
+from app.models.user import User
 from app.schemas.user import UserCreate, User as UserOut
 from app.repositories.user_repository import UserRepository
 from app.services.user_service import UserService
@@ -26,4 +28,13 @@ def login(
     service: UserService = Depends(get_user_service)
 ):
     user = service.authenticate(form_data.username, form_data.password)
-    return service.create_access_token_for_user(user)
\ No newline at end of file
+    return service.create_access_token_for_user(user)
+
+@router.post("/revoke")
+def revoke_tokens(
+    service: UserService = Depends(get_user_service),
+    current_user: User = Depends(get_current_user)
+):
+    """Отозвать все токены текущего пользователя (выход на всех устройствах)"""
+    service.revoke_tokens(current_user.id)
+    return {"message": "All tokens revoked"}
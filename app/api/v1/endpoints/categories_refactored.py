@@ -4,15 +4,17 @@ from typing import List
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
-from app.schemas.category import CategoryCreate, Category as CategoryOut
+from app.schemas.category import CategoryCreate, CategoryUpdate, Category as CategoryOut
 from app.repositories.category_repository import CategoryRepository
+from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.rollup_repository import RollupRepository
 from app.services.category_service import CategoryService
 
 router = APIRouter()
 
 def get_category_service(db: Session = Depends(get_db)) -> CategoryService:
     repository = CategoryRepository(db)
-    return CategoryService(repository)
+    return CategoryService(repository, TransactionRepository(db), RollupRepository(db))
 
 @router.post("/", response_model=CategoryOut)
 def create_category(
@@ -42,4 +44,17 @@ def get_category(
     category = service.get_by_id(category_id)
     if not category or category.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
\ No newline at end of file
+    return category
+
+@router.put("/{category_id}", response_model=CategoryOut)
+def update_category(
+    category_id: int,
+    category_data: CategoryUpdate,
+    service: CategoryService = Depends(get_category_service),
+    current_user: User = Depends(get_current_user)
+):
+    return service.update_category(
+        category_id,
+        current_user.id,
+        **category_data.model_dump(exclude_unset=True)
+    )
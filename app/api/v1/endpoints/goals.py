@@ -1,80 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
-from app.models.goal import Goal
+from app.core.database import get_async_db
 from app.schemas.goal import GoalCreate, GoalUpdate, Goal as GoalSchema
 from app.api.deps import get_current_active_user
 from app.models.user import User
+from app.repositories.goal_repository import GoalRepository
+from app.services.goal_service import GoalService
 
 router = APIRouter()
 
 
+def get_goal_service(db: AsyncSession = Depends(get_async_db)) -> GoalService:
+    return GoalService(GoalRepository(db))
+
+
 @router.post("/", response_model=GoalSchema)
-def create_goal(
+async def create_goal(
         goal_data: GoalCreate,
-        db: Session = Depends(get_db),
+        service: GoalService = Depends(get_goal_service),
         current_user: User = Depends(get_current_active_user)
 ):
-    goal = Goal(**goal_data.dict(), user_id=current_user.id)
-    db.add(goal)
-    db.commit()
-    db.refresh(goal)
-    return goal
+    return await service.create_goal(current_user.id, **goal_data.model_dump())
 
 
 @router.get("/", response_model=List[GoalSchema])
-def get_goals(
+async def get_goals(
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(get_db),
+        service: GoalService = Depends(get_goal_service),
         current_user: User = Depends(get_current_active_user)
 ):
-    goals = db.query(Goal).filter(Goal.user_id == current_user.id).offset(skip).limit(limit).all()
-    return goals
+    return await service.get_user_goals(current_user.id, skip, limit)
 
 
 @router.get("/{goal_id}", response_model=GoalSchema)
-def get_goal(
+async def get_goal(
         goal_id: int,
-        db: Session = Depends(get_db),
+        service: GoalService = Depends(get_goal_service),
         current_user: User = Depends(get_current_active_user)
 ):
-    goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == current_user.id).first()
-    if not goal:
-        raise HTTPException(status_code=404, detail="Goal not found")
-    return goal
+    return await service.get_user_goal(goal_id, current_user.id)
 
 
 @router.put("/{goal_id}", response_model=GoalSchema)
-def update_goal(
+async def update_goal(
         goal_id: int,
         goal_data: GoalUpdate,
-        db: Session = Depends(get_db),
+        service: GoalService = Depends(get_goal_service),
         current_user: User = Depends(get_current_active_user)
 ):
-    goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == current_user.id).first()
-    if not goal:
-        raise HTTPException(status_code=404, detail="Goal not found")
-
-    for key, value in goal_data.dict(exclude_unset=True).items():
-        setattr(goal, key, value)
-
-    db.commit()
-    db.refresh(goal)
-    return goal
+    return await service.update_goal(goal_id, current_user.id, **goal_data.model_dump(exclude_unset=True))
 
 
 @router.delete("/{goal_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_goal(
+async def delete_goal(
         goal_id: int,
-        db: Session = Depends(get_db),
+        service: GoalService = Depends(get_goal_service),
         current_user: User = Depends(get_current_active_user)
 ):
-    goal = db.query(Goal).filter(Goal.id == goal_id, Goal.user_id == current_user.id).first()
-    if not goal:
-        raise HTTPException(status_code=404, detail="Goal not found")
-
-    db.delete(goal)
-    db.commit()
-    return None
\ No newline at end of file
+    await service.delete_goal(goal_id, current_user.id)
+    return None
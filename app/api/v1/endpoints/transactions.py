@@ -31,6 +31,7 @@ def create_transaction(
     # Создаём транзакцию
     transaction = Transaction(
         **transaction_data.dict(),
+        type=category.type,
         user_id=current_user.id
     )
     db.add(transaction)
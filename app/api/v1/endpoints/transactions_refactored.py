@@ -1,19 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import date
+from typing import Annotated, List, Optional
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import get_current_user
 from app.models.user import User
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, Transaction as TransactionOut
+from app.schemas.transaction import (
+    TransactionCreate, TransactionUpdate, TransactionFilter, TransactionBatch, TransactionBatchResult,
+    Transaction as TransactionOut
+)
 from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.rollup_repository import RollupRepository
 from app.services.transaction_service import TransactionService
 
 router = APIRouter()
 
 def get_transaction_service(db: Session = Depends(get_db)) -> TransactionService:
     repository = TransactionRepository(db)
-    return TransactionService(repository)
+    return TransactionService(repository, RollupRepository(db))
 
 @router.post("/", response_model=TransactionOut)
 def create_transaction(
@@ -30,24 +34,48 @@ def create_transaction(
         transaction_date=data.get("date")
     )
 
+@router.post("/batch", response_model=TransactionBatchResult)
+def apply_transaction_batch(
+    batch: TransactionBatch,
+    service: TransactionService = Depends(get_transaction_service),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Пакет созданий, изменений и удалений одной транзакцией БД.
+    Результат — по каждому элементу; ошибочные элементы не применяются и содержат error.
+    """
+    return service.apply_batch(current_user.id, batch)
+
 @router.get("/", response_model=List[TransactionOut])
 def get_transactions(
+    response: Response,
+    filters: Annotated[TransactionFilter, Query()],
     service: TransactionService = Depends(get_transaction_service),
-    current_user: User = Depends(get_current_user),
-    start_date: Optional[date] = Query(None),
-    end_date: Optional[date] = Query(None),
-    category_id: Optional[int] = Query(None)
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Транзакции по всем заданным фильтрам сразу (один SQL-запрос).
+    Курсор следующей страницы — в заголовке X-Next-Cursor.
+    """
+    page = service.find_transactions(current_user.id, filters)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
+
+@router.get("/search", response_model=List[TransactionOut])
+def search_transactions(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = Query(None),
+    service: TransactionService = Depends(get_transaction_service),
+    current_user: User = Depends(get_current_user)
 ):
-    if start_date and end_date:
-        return service.get_transactions_by_date_range(
-            current_user.id, start_date, end_date
-        )
-    elif category_id:
-        return service.get_transactions_by_category(
-            current_user.id, category_id
-        )
-    else:
-        return service.get_user_transactions(current_user.id)
+    """Поиск по описанию: сначала самые релевантные; курсор следующей страницы — в X-Next-Cursor"""
+    page = service.search_transactions(current_user.id, q, limit, cursor)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.items
 
 @router.get("/{transaction_id}", response_model=TransactionOut)
 def get_transaction(
@@ -0,0 +1,115 @@
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class SharedCacheBackend(ABC):
+    """
+    Общее для всех воркеров хранилище (Redis и т.п.).
+    Значения — строки; incr атомарно увеличивает счётчик и возвращает новое значение.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+
+class RedisCacheBackend(SharedCacheBackend):
+    """Общий кэш в Redis; пакет redis (есть в requirements.txt) импортируется только при ANALYTICS_CACHE_REDIS_URL"""
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: str, ttl: float) -> None:
+        self.client.set(key, value, ex=max(int(ttl), 1))
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+class AnalyticsCache:
+    """
+    Кэш результатов аналитики по ключу (пользователь, версия, эндпоинт, параметры).
+    Любая запись данных пользователя увеличивает его версию — старые записи
+    больше не находятся и просто вытесняются по LRU/TTL.
+    Без общего бэкенда версии живут в процессе; с ним — версии и значения общие для всех воркеров,
+    а локальный LRU остаётся первым уровнем.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared: Optional[SharedCacheBackend] = None,
+                 enabled: bool = True):
+        self.ttl = ttl
+        self.enabled = enabled
+        self.shared = shared
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _version(self, user_id: int) -> int:
+        if self.shared is not None:
+            return int(self.shared.get(f"analytics:ver:{user_id}") or 0)
+        return self._versions.get(user_id, 0)
+
+    def invalidate_user(self, user_id: int) -> None:
+        if self.shared is not None:
+            self.shared.incr(f"analytics:ver:{user_id}")
+            return
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+
+    def get_or_compute(self, user_id: int, endpoint: str, params: dict, compute: Callable[[], Any]) -> Any:
+        if not self.enabled:
+            return compute()
+
+        key = "analytics:{}:{}:{}:{}".format(
+            user_id, self._version(user_id), endpoint, json.dumps(params, sort_keys=True, default=str)
+        )
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        if self.shared is not None:
+            raw = self.shared.get(key)
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(key, value)
+                return value
+
+        value = compute()
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, json.dumps(value, default=str), self.ttl)
+        return value
+
+    def clear(self) -> None:
+        self.local.clear()
+        with self._lock:
+            self._versions.clear()
+
+
+analytics_cache = AnalyticsCache(
+    maxsize=settings.ANALYTICS_CACHE_SIZE,
+    ttl=settings.ANALYTICS_CACHE_TTL,
+    shared=RedisCacheBackend(settings.ANALYTICS_CACHE_REDIS_URL) if settings.ANALYTICS_CACHE_REDIS_URL else None,
+    enabled=settings.ANALYTICS_CACHE_ENABLED,
+)
+
+
+def invalidate_user_analytics(user_id: int) -> None:
+    analytics_cache.invalidate_user(user_id)
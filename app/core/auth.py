@@ -0,0 +1,54 @@
+from typing import Optional, Tuple
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# user_id -> (token_version, is_active); держим недолго, чтобы отзыв токенов доходил до всех воркеров
+user_state_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+
+
+class Principal:
+    """Лёгкий пользователь из claims токена — без похода в БД"""
+
+    __slots__ = ("id", "username", "is_active", "token_version")
+
+    def __init__(self, id: int, username: str, is_active: bool, token_version: int):
+        self.id = id
+        self.username = username
+        self.is_active = is_active
+        self.token_version = token_version
+
+
+def token_claims(user) -> dict:
+    return {
+        "sub": str(user.id),
+        "username": user.username,
+        "is_active": bool(user.is_active),
+        "ver": user.token_version or 0,
+    }
+
+
+def remember_user(user) -> Tuple[int, bool]:
+    state = (user.token_version or 0, bool(user.is_active))
+    user_state_cache.set(user.id, state)
+    return state
+
+
+def forget_user(user_id: int) -> None:
+    user_state_cache.delete(user_id)
+
+
+def is_stateless_token(payload: dict) -> bool:
+    return settings.AUTH_STATELESS and "ver" in payload and "username" in payload
+
+
+def principal_from_claims(user_id: int, payload: dict, state: Tuple[int, bool]) -> Optional[Principal]:
+    """Principal, если версия токена совпадает с текущей версией пользователя; иначе None (токен отозван)"""
+    token_version, is_active = state
+    if payload.get("ver") != token_version:
+        return None
+    return Principal(
+        id=user_id,
+        username=payload["username"],
+        is_active=is_active,
+        token_version=token_version
+    )
@@ -1,10 +1,12 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Balance+"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
+    # development включает строгие проверки (например, запрет ленивой загрузки связей)
+    ENVIRONMENT: str = "production"
 
     # Database - PostgreSQL
     POSTGRES_USER: str = "postgres"
@@ -17,10 +19,83 @@ class Settings(BaseSettings):
     def DATABASE_URL(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+
+    # Пул соединений (для каждого движка: sync и async)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800  # секунды, -1 — не пересоздавать
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # 0 — без ограничения
+    # Схему ведёт Alembic; create_all при старте приложения — только для разработки
+    DB_CREATE_ALL: bool = False
+    # Ленивая загрузка связей в запросах репозиториев падает с ошибкой вместо N+1;
+    # по умолчанию включено только в development
+    DB_RAISELOAD: Optional[bool] = None
+    # Лог SQL-запросов дольше порога, мс (0 — без лога)
+    DB_SLOW_QUERY_MS: float = 500
+
+    @property
+    def raiseload_enabled(self) -> bool:
+        if self.DB_RAISELOAD is None:
+            return self.ENVIRONMENT == "development"
+        return self.DB_RAISELOAD
+
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Токен несёт id, username, is_active и версию — пользователь не грузится из БД на каждый запрос
+    AUTH_STATELESS: bool = True
+    AUTH_USER_CACHE_TTL: int = 60
+    AUTH_USER_CACHE_SIZE: int = 10000
+
+    # Пароли: стоимость bcrypt и пул процессов для хеширования (0 воркеров — в текущем потоке)
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_TIMEOUT: float = 10
+
+    # Keyset-пагинация списков
+    PAGE_SIZE_DEFAULT: int = 100
+    PAGE_SIZE_MAX: int = 500
+
+    # Пакетная запись транзакций: максимум операций в одном запросе /transactions/batch
+    TRANSACTION_BATCH_MAX: int = 1000
+
+    # Импорт CSV
+    CSV_IMPORT_BATCH_SIZE: int = 5000
+    CSV_IMPORT_MAX_ERRORS: int = 1000
+    IMPORT_USE_COPY: bool = True
+
+    # Экспорт CSV
+    CSV_EXPORT_BATCH_SIZE: int = 1000
+
+    # Аналитика: месячная свёртка monthly_category_totals вместо агрегации сырых транзакций
+    ANALYTICS_USE_ROLLUP: bool = True
+    ANALYTICS_TIMESERIES_MAX_POINTS: int = 1000
+    # Кэш результатов аналитики; без Redis версии пользователей локальны для воркера
+    # (другие воркеры увидят запись не позже чем через ANALYTICS_CACHE_TTL секунд)
+    ANALYTICS_CACHE_ENABLED: bool = True
+    ANALYTICS_CACHE_TTL: int = 60
+    ANALYTICS_CACHE_SIZE: int = 10000
+    ANALYTICS_CACHE_REDIS_URL: Optional[str] = None
+
+    # /health/ready: не готов, если SELECT 1 дольше порога или пул занят на эту долю;
+    # результат проверки кэшируется на HEALTH_CACHE_TTL секунд
+    HEALTH_DB_MAX_LATENCY_MS: float = 250
+    HEALTH_DB_CONNECT_TIMEOUT: int = 2  # секунды; меньше 2 libpq не допускает
+    HEALTH_POOL_MAX_UTILISATION: float = 0.9
+    HEALTH_CACHE_TTL: float = 2.0
+
+    # Метрики HTTP и SQL (/metrics, заголовок Server-Timing)
+    METRICS_ENABLED: bool = True
+    # Общий каталог для нескольких воркеров uvicorn; очищать при запуске сервиса
+    METRICS_MULTIPROC_DIR: Optional[str] = None
+    METRICS_FLUSH_INTERVAL: float = 1.0
 
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
@@ -36,4 +111,4 @@ class Settings(BaseSettings):
     }
 
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
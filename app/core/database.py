@@ -1,20 +1,84 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.pool_metrics import PoolStats, instrumented_pool_class
+from app.core.sql_metrics import instrument_engine
+
+# Статистика пулов (см. /metrics/db-pool)
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _connect_args(is_async: bool) -> dict:
+    if not settings.DB_STATEMENT_TIMEOUT_MS:
+        return {}
+    if is_async:
+        return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
 
 # Создаём движок БД
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=instrumented_pool_class(QueuePool, pool_stats),
+    connect_args=_connect_args(is_async=False),
+    **_pool_options()
+)
+
+# Асинхронный движок (asyncpg) для async-эндпоинтов
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_stats),
+    connect_args=_connect_args(is_async=True),
+    **_pool_options()
+)
+
+# Число и время SQL-запросов (см. /metrics); у async-движка события висят на sync_engine
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, settings.DB_SLOW_QUERY_MS)
+    instrument_engine(async_engine.sync_engine, settings.DB_SLOW_QUERY_MS)
 
-# Создаём фабрику сессий
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Создаём фабрику сессий. После коммита объекты не протухают: значения из INSERT/UPDATE ... RETURNING
+# остаются актуальными, и отдать объект в ответ можно без повторного SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Асинхронная фабрика: после коммита объекты не протухают, чтобы не ловить ленивую загрузку вне greenlet
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 # Базовый класс для моделей
 Base = declarative_base()
 
+
+def get_pool_status() -> dict:
+    """Текущее состояние обоих пулов и гистограммы ожидания соединения"""
+    return {
+        "sync": pool_stats.snapshot(engine.pool),
+        "async": async_pool_stats.snapshot(async_engine.pool),
+    }
+
+
 # Зависимость для получения сессии БД
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Зависимость для получения асинхронной сессии БД
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
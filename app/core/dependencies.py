@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
+from app.core.auth import is_stateless_token, principal_from_claims, remember_user, user_state_cache
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.user import User
@@ -35,8 +36,22 @@ def get_current_user(
     except (JWTError, ValueError):  # ← добавили ValueError
         raise credentials_exception
 
+    # Stateless-режим: пользователь собирается из claims, БД — только при промахе кэша
+    if is_stateless_token(payload):
+        state = user_state_cache.get(user_id)
+        if state is None:
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is None:
+                raise credentials_exception
+            state = remember_user(user)
+
+        principal = principal_from_claims(user_id, payload, state)
+        if principal is None:
+            raise credentials_exception
+        return principal
+
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         raise credentials_exception
 
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,118 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.pool import Pool, QueuePool
+from app.core.config import settings
+from app.core.database import async_engine, engine
+
+
+def pool_usage(pool: Pool, max_overflow: int) -> dict:
+    """Занятость пула: сколько соединений выдано из максимально возможного"""
+    capacity = pool.size() + max(max_overflow, 0)
+    checked_out = pool.checkedout()
+    return {
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "utilisation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+class ReadinessProbe:
+    """
+    Готовность принимать трафик: время SELECT 1 и занятость пулов против порогов.
+    Результат кэшируется на ttl секунд, и одновременно идёт не больше одной проверки:
+    пока она идёт, остальные запросы получают прошлый результат, а не ждут в очереди.
+    """
+
+    def __init__(self, engine: Engine, engines: Dict[str, Engine], ttl: float,
+                 max_latency_ms: float, max_utilisation: float):
+        self.engine = engine
+        # Пул берётся у движка на каждой проверке: после dispose() он новый
+        self.engines = engines
+        self.ttl = ttl
+        self.max_latency_ms = max_latency_ms
+        self.max_utilisation = max_utilisation
+        self._lock = threading.Lock()
+        # (время проверки, результат) — одной ссылкой, чтобы читать без блокировки
+        self._cached: Optional[Tuple[float, Tuple[bool, dict]]] = None
+
+    def _fresh(self) -> Optional[Tuple[bool, dict]]:
+        cached = self._cached
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+        return None
+
+    def check(self) -> Tuple[bool, dict]:
+        result = self._fresh()
+        if result is not None:
+            return result
+        cached = self._cached
+        # Проверка уже идёт в другом потоке: отдаём устаревший результат; без него — ждём её
+        if not self._lock.acquire(blocking=cached is None):
+            return cached[1]
+        try:
+            result = self._fresh()
+            if result is None:
+                result = self._probe()
+                self._cached = (time.monotonic(), result)
+            return result
+        finally:
+            self._lock.release()
+
+    def _probe(self) -> Tuple[bool, dict]:
+        pools = {name: pool_usage(target.pool, settings.DB_MAX_OVERFLOW) for name, target in self.engines.items()}
+        saturated = any(usage["utilisation"] >= self.max_utilisation for usage in pools.values())
+        pool_check = {"ok": not saturated, **pools}
+
+        if saturated:
+            # В занятом пуле SELECT 1 ждал бы соединение до DB_POOL_TIMEOUT — не пробуем
+            database = {"ok": False, "error": "connection pool saturated"}
+        else:
+            database = self._probe_database()
+
+        ok = database["ok"] and pool_check["ok"]
+        return ok, {"status": "ready" if ok else "not_ready", "checks": {"database": database, "pool": pool_check}}
+
+    def _probe_database(self) -> dict:
+        try:
+            with self.engine.connect() as conn:
+                # Меряется только сам запрос: подключение (и pre-ping, если он включён у движка)
+                # ограничено своими таймаутами и в задержку БД не входит
+                started = time.perf_counter()
+                conn.exec_driver_sql("SELECT 1")
+                latency_ms = (time.perf_counter() - started) * 1000
+        except SQLAlchemyError as e:
+            return {"ok": False, "error": type(e).__name__}
+        return {"ok": latency_ms <= self.max_latency_ms, "latency_ms": round(latency_ms, 2)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._cached = None
+
+
+# Отдельное соединение для проверки: не ждёт в занятом пуле приложения, не делает pre-ping,
+# подключение и сам SELECT 1 ограничены таймаутами — зависшая БД не подвешивает /health/ready.
+# После обрыва соединение пула инвалидируется, следующая проверка подключится заново
+probe_engine = create_engine(
+    settings.DATABASE_URL,
+    poolclass=QueuePool,
+    pool_size=1,
+    max_overflow=0,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    connect_args={
+        "connect_timeout": settings.HEALTH_DB_CONNECT_TIMEOUT,
+        "options": f"-c statement_timeout={max(int(settings.HEALTH_DB_MAX_LATENCY_MS), 1)}",
+    },
+)
+
+
+readiness_probe = ReadinessProbe(
+    probe_engine,
+    {"sync": engine, "async": async_engine.sync_engine},
+    ttl=settings.HEALTH_CACHE_TTL,
+    max_latency_ms=settings.HEALTH_DB_MAX_LATENCY_MS,
+    max_utilisation=settings.HEALTH_POOL_MAX_UTILISATION,
+)
@@ -0,0 +1,94 @@
+import asyncio
+import time
+from typing import Tuple
+from app.core.config import settings
+from app.core.metrics import Metrics, MetricsExporter, describe
+from app.core.sql_metrics import finish_request, sql_metrics, start_request
+
+# Границы гистограмм: время ответа, секунды; размер тела ответа, байты
+LATENCY_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS: Tuple[float, ...] = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+HTTP_REQUESTS = describe("http_requests_total", "counter", "HTTP requests by route and status.")
+HTTP_ERRORS = describe("http_request_errors_total", "counter", "HTTP requests that ended with 5xx or an exception.")
+HTTP_DURATION = describe("http_request_duration_seconds", "histogram", "Time to serve a request.")
+HTTP_RESPONSE_SIZE = describe("http_response_size_bytes", "histogram", "Response body size.")
+HTTP_IN_FLIGHT = describe("http_requests_in_flight", "gauge", "Requests being served right now.")
+HTTP_DB_STATEMENTS = describe(
+    "http_request_db_statements_total", "counter", "SQL statements issued while serving requests."
+)
+HTTP_DB_SECONDS = describe("http_request_db_seconds_total", "counter", "Time spent in SQL while serving requests.")
+
+# Пишется из event loop (middleware), а снимок снимает и sync-эндпоинт /metrics в пуле потоков —
+# без блокировки снимок мог бы застать словарь посреди вставки
+http_metrics = Metrics(thread_safe=True)
+
+
+def route_template(scope) -> str:
+    """
+    Шаблон маршрута (/api/v1/transactions/{transaction_id}) для меток метрик — path_format
+    сработавшего маршрута. Ненайденные пути — одна метка, чтобы не плодить серии.
+    """
+    # Новые FastAPI подключают роутеры лениво: scope["route"] — маршрут вложенного роутера
+    # без префикса, полный шаблон — в контексте маршрута FastAPI
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    template = getattr(context, "path_format", None) or getattr(scope.get("route"), "path_format", None)
+    return template or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время ответа, размер, статус и SQL каждого HTTP-запроса.
+    Итог по SQL уходит в заголовок Server-Timing (для потоковых ответов — только запросы
+    до начала ответа), всё остальное — в метрики маршрута для /metrics.
+    """
+
+    def __init__(self, app, exporter: MetricsExporter, server_timing: bool = True):
+        self.app = app
+        self.exporter = exporter
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats, token = start_request()
+        status_code, size = 500, 0
+
+        async def send_with_metrics(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", stats.server_timing().encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_metrics.add_gauge(HTTP_IN_FLIGHT, 1)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            finish_request(token)
+            http_metrics.add_gauge(HTTP_IN_FLIGHT, -1)
+            route = (("method", scope["method"]), ("route", route_template(scope)))
+            http_metrics.inc(HTTP_REQUESTS, route + (("status", str(status_code)),))
+            if status_code >= 500:
+                http_metrics.inc(HTTP_ERRORS, route)
+            http_metrics.observe(HTTP_DURATION, LATENCY_BUCKETS, time.perf_counter() - started, route)
+            http_metrics.observe(HTTP_RESPONSE_SIZE, SIZE_BUCKETS, size, route)
+            http_metrics.inc(HTTP_DB_STATEMENTS, route, stats.count)
+            http_metrics.inc(HTTP_DB_SECONDS, route, stats.total)
+            self.exporter.request_flush(asyncio.get_running_loop())
+
+
+# С METRICS_MULTIPROC_DIR /metrics любого воркера отдаёт сумму по всем воркерам
+metrics_exporter = MetricsExporter(
+    [http_metrics, sql_metrics],
+    directory=settings.METRICS_MULTIPROC_DIR,
+    flush_interval=settings.METRICS_FLUSH_INTERVAL,
+)
@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Описание метрик для /metrics: имя -> (тип, HELP)
+METRIC_HELP: Dict[str, Tuple[str, str]] = {}
+
+
+def describe(name: str, kind: str, help_text: str) -> str:
+    METRIC_HELP[name] = (kind, help_text)
+    return name
+
+
+class Metrics:
+    """
+    Счётчики, gauge и гистограммы одного процесса. Обновление — словарь в памяти;
+    блокировка не нужна (thread_safe=False), только если и запись, и снимки идут в одном потоке.
+    Снимок (snapshot) — JSON-совместимый, снимки воркеров складываются при сборе.
+    """
+
+    def __init__(self, thread_safe: bool = False):
+        self._lock = threading.Lock() if thread_safe else nullcontext()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters: Dict[Tuple[str, Labels], float] = {}
+            self.gauges: Dict[Tuple[str, Labels], float] = {}
+            # (имя, метки) -> [границы, счётчики по корзинам (последняя — +Inf), сумма]
+            self.histograms: Dict[Tuple[str, Labels], list] = {}
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1) -> None:
+        with self._lock:
+            key = (name, labels)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_gauge(self, name: str, value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            key = (name, labels)
+            self.gauges[key] = self.gauges.get(key, 0) + value
+
+    def observe(self, name: str, buckets: Tuple[float, ...], value: float, labels: Labels = ()) -> None:
+        with self._lock:
+            histogram = self.histograms.get((name, labels))
+            if histogram is None:
+                histogram = self.histograms[(name, labels)] = [buckets, [0] * (len(buckets) + 1), 0.0]
+            histogram[1][bisect_left(buckets, value)] += 1
+            histogram[2] += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "counters": [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                "gauges": [[name, list(labels), value] for (name, labels), value in self.gauges.items()],
+                "histograms": [
+                    [name, list(labels), list(bounds), list(counts), total]
+                    for (name, labels), (bounds, counts, total) in self.histograms.items()
+                ],
+            }
+
+
+def merge_snapshots(snapshots: Iterable[dict]) -> dict:
+    """Сумма снимков нескольких процессов (и нескольких Metrics одного процесса)"""
+    counters: Dict[tuple, float] = {}
+    gauges: Dict[tuple, float] = {}
+    histograms: Dict[tuple, list] = {}
+    for snapshot in snapshots:
+        for target, kind in ((counters, "counters"), (gauges, "gauges")):
+            for name, labels, value in snapshot.get(kind, ()):
+                key = (name, tuple(map(tuple, labels)))
+                target[key] = target.get(key, 0) + value
+        for name, labels, bounds, counts, total in snapshot.get("histograms", ()):
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = [tuple(bounds), list(counts), total]
+            else:
+                merged[1] = [a + b for a, b in zip(merged[1], counts)]
+                merged[2] += total
+    return {"counters": counters, "gauges": gauges, "histograms": histograms}
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_prometheus(merged: dict) -> str:
+    """Объединённые метрики в текстовом формате Prometheus"""
+    families: Dict[str, List[str]] = {}
+
+    for kind in ("counters", "gauges"):
+        for (name, labels), value in sorted(merged[kind].items()):
+            families.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    for (name, labels), (bounds, counts, total) in sorted(merged["histograms"].items()):
+        lines = families.setdefault(name, [])
+        running = 0
+        for bound, count in zip(tuple(bounds) + (float("inf"),), counts):
+            running += count
+            le = "+Inf" if bound == float("inf") else str(bound)
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {running}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {running}")
+
+    output = []
+    for name in sorted(families):
+        kind, help_text = METRIC_HELP.get(name, ("untyped", name))
+        output += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *families[name]]
+    return "\n".join(output) + "\n"
+
+
+class MetricsDirectory:
+    """
+    Обмен снимками между воркерами uvicorn: каждый пишет свой файл <pid>-<метка>.json (атомарно),
+    /metrics в любом воркере складывает все файлы. Метка случайная на каждый процесс: воркер,
+    получивший pid завершившегося, не перезапишет его счётчики. Счётчики умерших воркеров
+    остаются — суммы не уменьшаются при рестарте; их gauge (запросы в работе) отбрасываются.
+    Посторонние файлы в каталоге пропускаются. Каталог нужно очищать при запуске сервиса, а не воркера.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, worker: str, snapshot: dict) -> None:
+        target = os.path.join(self.path, f"{worker}.json")
+        temporary = f"{target}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(temporary, target)
+
+    def read(self, skip_worker: Optional[str] = None) -> List[dict]:
+        snapshots = []
+        for filename in os.listdir(self.path):
+            worker = filename[:-5]
+            pid = worker.split("-", 1)[0]
+            if not filename.endswith(".json") or not pid.isdigit() or worker == skip_worker:
+                continue
+            try:
+                with open(os.path.join(self.path, filename)) as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _alive(int(pid)):
+                snapshot["gauges"] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsExporter:
+    """
+    Метрики процесса для /metrics. С каталогом воркеров снимок пишется в файл
+    не чаще раза в flush_interval секунд (последние изменения — отложенной записью),
+    сбор читает файлы остальных воркеров и живые значения своего.
+    """
+
+    def __init__(self, sources: List[Metrics], directory: Optional[str] = None, flush_interval: float = 1.0):
+        self.sources = sources
+        self.directory = MetricsDirectory(directory) if directory else None
+        self.flush_interval = flush_interval
+        self._last_flush = 0.0
+        self._flush_scheduled = False
+        self._worker: Optional[Tuple[int, str]] = None
+
+    def worker_id(self) -> str:
+        """Имя файла процесса; после fork у потомка — новое"""
+        pid = os.getpid()
+        if self._worker is None or self._worker[0] != pid:
+            self._worker = (pid, f"{pid}-{uuid.uuid4().hex[:12]}")
+        return self._worker[1]
+
+    def flush(self) -> None:
+        self._flush_scheduled = False
+        if self.directory is None:
+            return
+        self._last_flush = time.monotonic()
+        # Складывать здесь не нужно: сбор всё равно суммирует элементы
+        snapshots = [source.snapshot() for source in self.sources]
+        self.directory.write(self.worker_id(), {
+            kind: [item for snapshot in snapshots for item in snapshot[kind]]
+            for kind in ("counters", "gauges", "histograms")
+        })
+
+    def request_flush(self, loop=None) -> None:
+        """Вызывается после каждого запроса; пишет сразу или откладывает до конца интервала"""
+        if self.directory is None or self._flush_scheduled:
+            return
+        delay = self._last_flush + self.flush_interval - time.monotonic()
+        if delay <= 0 or loop is None:
+            self.flush()
+        else:
+            self._flush_scheduled = True
+            loop.call_later(delay, self.flush)
+
+    def render(self) -> str:
+        snapshots = [source.snapshot() for source in self.sources]
+        if self.directory is not None:
+            snapshots += self.directory.read(skip_worker=self.worker_id())
+        return render_prometheus(merge_snapshots(snapshots))
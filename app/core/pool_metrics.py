@@ -0,0 +1,82 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Tuple, Type
+from sqlalchemy import exc
+from sqlalchemy.pool import Pool
+
+# Границы гистограммы ожидания соединения, секунды
+WAIT_TIME_BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class PoolStats:
+    """Статистика выдачи соединений из пула: сколько ждали и сколько раз не дождались"""
+
+    def __init__(self, buckets: Tuple[float, ...] = WAIT_TIME_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.wait_counts = [0] * (len(self.buckets) + 1)
+            self.wait_sum = 0.0
+            self.checkouts = 0
+            self.timeouts = 0
+
+    def observe_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_counts[bisect_left(self.buckets, seconds)] += 1
+            self.wait_sum += seconds
+            self.checkouts += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool: Pool) -> dict:
+        with self._lock:
+            counts = list(self.wait_counts)
+            wait_sum, checkouts, timeouts = self.wait_sum, self.checkouts, self.timeouts
+
+        # Гистограмма кумулятивная, как в Prometheus
+        histogram, running = {}, 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            running += count
+            histogram["+Inf" if bound == float("inf") else str(bound)] = running
+
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts_total": checkouts,
+            "timeouts_total": timeouts,
+            "wait_seconds": {
+                "buckets": histogram,
+                "sum": wait_sum,
+                "count": checkouts,
+            },
+        }
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        self.stats.observe_wait(time.perf_counter() - started)
+        return connection
+
+
+def instrumented_pool_class(pool_class: Type[Pool], stats: PoolStats) -> Type[Pool]:
+    """
+    Подкласс пула, который меряет ожидание соединения.
+    Статистика живёт в классе, поэтому переживает engine.dispose() и пересоздание пула.
+    """
+    return type(pool_class.__name__, (_InstrumentedPoolMixin, pool_class), {"stats": stats})
@@ -1,21 +1,121 @@
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+class PasswordHasherBusy(Exception):
+    """Очередь на хеширование паролей переполнена или результат не дождались"""
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
 
+@lru_cache(maxsize=None)
+def _crypt_context(rounds: int) -> CryptContext:
+    # min/max = rounds: хеши с другой стоимостью помечаются как требующие перехеширования
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
 
-def get_password_hash(password: str) -> str:
+
+def _truncate(password: str) -> str:
     # bcrypt ограничение 72 байта
     if len(password.encode('utf-8')) > 72:
         password = password[:72]
-    return pwd_context.hash(password)
+    return password
+
+
+# Функции ниже выполняются в процессах пула, поэтому они на уровне модуля и принимают стоимость явно
+
+def _hash(password: str, rounds: int) -> str:
+    return _crypt_context(rounds).hash(_truncate(password))
+
+
+def _verify(plain_password: str, hashed_password: str, rounds: int) -> bool:
+    return _crypt_context(rounds).verify(plain_password, hashed_password)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _crypt_context(rounds).verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Выносит bcrypt в отдельный пул процессов, чтобы не занимать GIL и потоки запросов.
+    Одновременно в работе не больше max_pending операций, лишние сразу отклоняются.
+    """
+
+    def __init__(self, workers: int, max_pending: int, timeout: float):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # spawn: дочерним процессам не достаются соединения с БД и потоки родителя
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def run(self, func: Callable, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Too many concurrent password operations")
+        if self.workers <= 0:
+            try:
+                return func(*args)
+            finally:
+                self._slots.release()
+        try:
+            future: Future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Слот занят, пока операция реально идёт в пуле: после таймаута запущенный bcrypt
+        # не отменить, и новые операции не должны вставать за ним сверх max_pending
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy("Password operation timed out")
+
+    def shutdown(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.PASSWORD_HASH_TIMEOUT,
+)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return password_hasher.run(_verify, plain_password, hashed_password, settings.BCRYPT_ROUNDS)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверяет пароль; если стоимость хеша устарела — возвращает новый хеш"""
+    return password_hasher.run(_verify_and_update, plain_password, hashed_password, settings.BCRYPT_ROUNDS)
+
+
+def get_password_hash(password: str) -> str:
+    return password_hasher.run(_hash, password, settings.BCRYPT_ROUNDS)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -26,4 +126,4 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
\ No newline at end of file
+    return encoded_jwt
@@ -0,0 +1,89 @@
+import logging
+import time
+from contextvars import ContextVar, Token
+from typing import Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import Metrics, describe
+from app.core.pool_metrics import WAIT_TIME_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Границы гистограммы длительности одного SQL-запроса, секунды
+STATEMENT_TIME_BUCKETS: Tuple[float, ...] = WAIT_TIME_BUCKETS
+# Сколько символов запроса попадает в лог медленных запросов
+SLOW_STATEMENT_LOG_CHARS = 1000
+
+DB_STATEMENT_SECONDS = describe("db_statement_duration_seconds", "histogram", "Duration of SQL statements.")
+DB_SLOW_STATEMENTS = describe("db_slow_statements_total", "counter", "SQL statements slower than DB_SLOW_QUERY_MS.")
+
+# Хуки движка срабатывают и в потоках threadpool — нужна блокировка
+sql_metrics = Metrics(thread_safe=True)
+
+
+class RequestQueryStats:
+    """SQL одного HTTP-запроса: число запросов, суммарное время и самый долгий"""
+
+    __slots__ = ("count", "total", "slowest", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def observe(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.slowest:
+            self.slowest = seconds
+            self.slowest_statement = statement
+
+    def server_timing(self) -> str:
+        """Значение заголовка Server-Timing (длительности — в миллисекундах)"""
+        return (
+            f'db;dur={self.total * 1000:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest * 1000:.2f}"
+        )
+
+
+# Статистика текущего запроса; в sync-эндпоинты (threadpool) контекст копируется вместе с объектом
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+def start_request() -> Tuple[RequestQueryStats, Token]:
+    stats = RequestQueryStats()
+    return stats, _current.set(stats)
+
+
+def finish_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float = 0) -> None:
+    """
+    Хуки на движок: время каждого запроса идёт в статистику текущего HTTP-запроса и процесса,
+    запросы дольше slow_query_ms (0 — не логировать) пишутся в лог.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started"].pop()
+        sql_metrics.observe(DB_STATEMENT_SECONDS, STATEMENT_TIME_BUCKETS, seconds)
+        if slow_query_ms and seconds * 1000 >= slow_query_ms:
+            logger.warning("Slow query (%.1f ms): %s", seconds * 1000, statement[:SLOW_STATEMENT_LOG_CHARS])
+            sql_metrics.inc(DB_SLOW_STATEMENTS)
+        stats = _current.get()
+        if stats is not None:
+            stats.observe(statement, seconds)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # Упавший запрос не доходит до after_cursor_execute — убираем его отметку
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_started"):
+            connection.info["query_started"].pop()
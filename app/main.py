@@ -1,18 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.config import settings
 from app.api.v1.router import router as api_router
-from app.core.database import engine, Base
+from app.core.database import async_engine, Base, get_pool_status
+from app.core.security import password_hasher
+from app.core.health import readiness_probe
+from app.core.http_metrics import MetricsMiddleware, metrics_exporter
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Импорт приложения не ходит в БД; таблицы создаются только по явному DB_CREATE_ALL (разработка)
+    if settings.DB_CREATE_ALL:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    yield
+    # Закрываем соединения asyncpg в том же event loop, где они открывались
+    await async_engine.dispose()
+    password_hasher.shutdown()
+    # Последние значения воркера — в общий каталог метрик
+    metrics_exporter.flush()
 
-# Создаём таблицы (для разработки)
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
+# Время ответа, ошибки и SQL по маршрутам: /metrics и заголовок Server-Timing
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, exporter=metrics_exporter)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -35,4 +57,29 @@ def root():
 
 @app.get("/health")
 def health():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/health/live")
+def health_live():
+    """Процесс жив и отвечает; БД не проверяется — её падение не повод перезапускать под"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """Готовность принимать трафик: задержка БД и занятость пулов; 503 — убрать под из балансировки"""
+    ready, report = readiness_probe.check()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
+
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    """Состояние пулов соединений: занятые, overflow, ожидание соединения"""
+    return get_pool_status()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """HTTP- и SQL-метрики (всех воркеров, если задан METRICS_MULTIPROC_DIR) в формате Prometheus"""
+    return PlainTextResponse(metrics_exporter.render(), media_type="text/plain; version=0.0.4")
@@ -2,5 +2,6 @@ from .user import User
 from .category import Category
 from .transaction import Transaction
 from .goal import Goal
+from .monthly_category_total import MonthlyCategoryTotal
 
-__all__ = ["User", "Category", "Transaction", "Goal"]
\ No newline at end of file
+__all__ = ["User", "Category", "Transaction", "Goal", "MonthlyCategoryTotal"]
\ No newline at end of file
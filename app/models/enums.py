@@ -2,4 +2,12 @@ from enum import Enum
 
 class TransactionType(str, Enum):
     INCOME = "income"
-    EXPENSE = "expense"
\ No newline at end of file
+    EXPENSE = "expense"
+
+class Bucket(str, Enum):
+    """Шаг временного ряда аналитики (совпадает с единицами date_trunc)"""
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
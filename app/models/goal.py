@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.types import Money, money
 
 
 class Goal(Base):
@@ -9,10 +10,15 @@ class Goal(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    target_amount = Column(Float, nullable=False)
-    current_amount = Column(Float, default=0)
+    target_amount = Column(Money(), nullable=False)
+    current_amount = Column(Money(), default=0)
     deadline = Column(DateTime, nullable=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    user = relationship("User", backref="goals")
\ No newline at end of file
+    user = relationship("User", backref="goals")
+
+    @validates("target_amount", "current_amount")
+    def _round_money(self, key, value):
+        # Ответ после записи берётся из объекта — он должен совпадать с NUMERIC(…, 2) в БД
+        return None if value is None else money(value)
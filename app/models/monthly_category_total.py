@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, Enum as SQLEnum
+from app.core.database import Base
+from app.models.enums import TransactionType
+from app.models.types import Money
+
+
+class MonthlyCategoryTotal(Base):
+    """Свёртка транзакций по месяцам и категориям — поддерживается при каждой записи"""
+    __tablename__ = "monthly_category_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Первое число месяца (UTC)
+    month = Column(Date, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    type = Column(SQLEnum(TransactionType), primary_key=True)
+    # Сумма за месяц может быть больше одной транзакции — запас по разрядам
+    total = Column(Money(18), nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
@@ -1,16 +1,48 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Text, Index, Computed, DDL, desc, event, text, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.models.enums import TransactionType
+from app.models.types import Money, money
+
+# Конфигурация полнотекстового поиска: русская морфология, латиница — через english_stem
+SEARCH_CONFIG = "russian"
+# Триграммный индекс для поиска подстрок; нужен pg_trgm, поэтому его нет в метаданных (см. ниже)
+DESCRIPTION_TRGM_INDEX = "ix_transactions_description_trgm"
 
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Списки, экспорт и аналитика: пользователь + период, новые сначала;
+        # id в конце — ключ keyset-пагинации (date, id) целиком берётся из индекса
+        Index("ix_transactions_user_id_date", "user_id", desc("date"), desc("id")),
+        # Фильтр по категории внутри пользователя
+        Index("ix_transactions_user_id_category_id_date", "user_id", "category_id", "date"),
+        # Баланс и аналитика по типу — без join с categories
+        Index("ix_transactions_user_id_type_date", "user_id", "type", "date"),
+        # Полнотекстовый поиск по описанию
+        Index("ix_transactions_search_vector", "search_vector", postgresql_using="gin"),
+    )
+    # Значения, вычисленные БД (date по умолчанию, type из подзапроса), приходят через RETURNING
+    # и в INSERT, и в UPDATE — без отдельного SELECT после записи.
+    # search_vector есть только в таблице: в ORM он не нужен, а как вычисляемое поле
+    # попадал бы в RETURNING каждой записи; запросы берут Transaction.__table__.c.search_vector
+    __mapper_args__ = {"eager_defaults": True, "exclude_properties": ["search_vector"]}
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money(), nullable=False)
     description = Column(Text, nullable=True)
     date = Column(DateTime(timezone=True), server_default=func.now())
+    # Вычисляется самой БД; не отображается в ORM (см. __mapper_args__)
+    search_vector = Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(description, ''))", persisted=True)
+    )
+
+    # Копия categories.type: доход/расход без join; меняется вместе с категорией
+    type = Column(SQLEnum(TransactionType), nullable=False)
 
     # Внешние ключи
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -18,4 +50,24 @@ class Transaction(Base):
 
     # Связи
     user = relationship("User", backref="transactions")
-    category = relationship("Category", back_populates="transactions")
\ No newline at end of file
+    category = relationship("Category", back_populates="transactions")
+
+    @validates("amount")
+    def _round_amount(self, key, value):
+        # Ответ после записи берётся из объекта — он должен совпадать с NUMERIC(…, 2) в БД
+        return None if value is None else money(value)
+
+
+def _trgm_installed(ddl, target, bind, **kw) -> bool:
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar() is not None
+
+
+# create_all (разработка): триграммный индекс — только если расширение уже установлено
+event.listen(
+    Transaction.__table__,
+    "after_create",
+    DDL(
+        f"CREATE INDEX IF NOT EXISTS {DESCRIPTION_TRGM_INDEX} "
+        "ON transactions USING gin (description gin_trgm_ops)"
+    ).execute_if(callable_=_trgm_installed)
+)
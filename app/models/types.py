@@ -0,0 +1,25 @@
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy import Numeric
+
+CENT = Decimal("0.01")
+
+
+class Money(Numeric):
+    """
+    Денежная сумма: точный NUMERIC(precision, 2) в БД, суммы считаются без ошибок округления.
+    В Python — float (asdecimal=False): схемы и JSON обходятся без Decimal.
+    Модели округляют значение при присваивании (money), чтобы объект совпадал со строкой в БД.
+    """
+
+    cache_ok = True
+
+    def __init__(self, precision: int = 14):
+        super().__init__(precision=precision, scale=2, asdecimal=False)
+
+
+def money(value) -> float:
+    """
+    Округление до копеек, как у NUMERIC(…, 2): половина — от нуля, по десятичной записи числа
+    (10.005 -> 10.01, хотя в двоичном float это 10.00499…)
+    """
+    return float(Decimal(repr(float(value))).quantize(CENT, rounding=ROUND_HALF_UP))
@@ -0,0 +1,167 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Date, DateTime, cast, func, null, select, tuple_
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction
+from app.models.category import Category
+from app.models.enums import Bucket, TransactionType
+from app.models.monthly_category_total import MonthlyCategoryTotal
+from app.models.types import money
+
+
+def _sum_of(type: TransactionType):
+    # SUM(amount) FILTER (WHERE type = ...) — доходы и расходы за один проход
+    return func.coalesce(func.sum(Transaction.amount).filter(Transaction.type == type), 0)
+
+
+def _bucket_of(bucket: Bucket, column):
+    # date_trunc по UTC-времени, результат — дата начала интервала
+    return cast(func.date_trunc(bucket.value, func.timezone("UTC", column)), Date)
+
+
+class AnalyticsRepository:
+    """Агрегаты по транзакциям пользователя: всё считается в БД одним запросом"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _period_filters(self, user_id: int, start: Optional[datetime], end: Optional[datetime],
+                        end_inclusive: bool) -> list:
+        filters = [Transaction.user_id == user_id]
+        if start:
+            filters.append(Transaction.date >= start)
+        if end:
+            filters.append(Transaction.date <= end if end_inclusive else Transaction.date < end)
+        return filters
+
+    def get_totals(self, user_id: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                   end_inclusive: bool = False) -> Tuple[float, float]:
+        """(доходы, расходы) за период — одна таблица, без join с категориями"""
+        stmt = select(
+            _sum_of(TransactionType.INCOME),
+            _sum_of(TransactionType.EXPENSE)
+        ).select_from(Transaction).where(*self._period_filters(user_id, start, end, end_inclusive))
+
+        income, expense = self.db.execute(stmt).one()
+        return float(income), float(expense)
+
+    def get_totals_with_categories(self, user_id: int, start: Optional[datetime] = None,
+                                   end: Optional[datetime] = None,
+                                   end_inclusive: bool = False) -> Tuple[float, float, Dict[str, float]]:
+        """
+        (доходы, расходы, расходы по категориям) за период одним сканом:
+        GROUPING SETS ((name, type), ()) даёт строки по категориям и итоговую строку.
+        """
+        stmt = select(
+            Category.name,
+            Transaction.type,
+            func.grouping(Category.name, Transaction.type).label("is_total"),
+            _sum_of(TransactionType.INCOME).label("income"),
+            _sum_of(TransactionType.EXPENSE).label("expense")
+        ).select_from(Transaction).join(
+            Category, Transaction.category_id == Category.id
+        ).where(
+            *self._period_filters(user_id, start, end, end_inclusive)
+        ).group_by(
+            func.grouping_sets(tuple_(Category.name, Transaction.type), tuple_())
+        )
+
+        income, expense, by_category = 0.0, 0.0, {}
+        for row in self.db.execute(stmt):
+            if row.is_total:
+                income, expense = float(row.income), float(row.expense)
+            elif row.type == TransactionType.EXPENSE:
+                by_category[row.name] = by_category.get(row.name, 0.0) + float(row.expense)
+        return income, expense, by_category
+
+    def get_expenses_by_category(self, user_id: int, start: Optional[datetime] = None,
+                                 end: Optional[datetime] = None) -> List[Tuple[str, float]]:
+        stmt = select(
+            Category.name,
+            func.coalesce(func.sum(Transaction.amount), 0).label('total')
+        ).join(
+            Transaction, Transaction.category_id == Category.id
+        ).where(
+            *self._period_filters(user_id, start, end, end_inclusive=True),
+            Transaction.type == TransactionType.EXPENSE
+        ).group_by(Category.name)
+
+        return [(name, float(total)) for name, total in self.db.execute(stmt)]
+
+    def get_timeseries(self, user_id: int, bucket: Bucket, start: datetime, end: datetime,
+                       by_category: bool = False) -> List[Tuple[date, Optional[str], TransactionType, float]]:
+        """Суммы (интервал, категория, тип) за [start, end) одним GROUP BY по date_trunc"""
+        period = _bucket_of(bucket, Transaction.date)
+        group = [period, Transaction.type] + ([Category.name] if by_category else [])
+        stmt = select(
+            period,
+            Category.name if by_category else null(),
+            Transaction.type,
+            func.sum(Transaction.amount)
+        ).select_from(Transaction).where(
+            *self._period_filters(user_id, start, end, end_inclusive=False)
+        ).group_by(*group)
+        # Категории нужны только ради имён
+        if by_category:
+            stmt = stmt.join(Category, Transaction.category_id == Category.id)
+
+        return [(period, name, type, float(total)) for period, name, type, total in self.db.execute(stmt)]
+
+    # Чтение из свёртки monthly_category_totals: строк на порядки меньше, чем транзакций
+
+    def get_month_from_rollup(self, user_id: int, month: date) -> Tuple[float, float, Dict[str, float]]:
+        """(доходы, расходы, расходы по категориям) за месяц из свёртки"""
+        stmt = select(
+            Category.name,
+            MonthlyCategoryTotal.type,
+            func.sum(MonthlyCategoryTotal.total)
+        ).join(
+            Category, MonthlyCategoryTotal.category_id == Category.id
+        ).where(
+            MonthlyCategoryTotal.user_id == user_id,
+            MonthlyCategoryTotal.month == month
+        ).group_by(Category.name, MonthlyCategoryTotal.type)
+
+        income, expense, by_category = 0.0, 0.0, {}
+        for name, type, total in self.db.execute(stmt):
+            if type == TransactionType.INCOME:
+                income += float(total)
+            else:
+                expense += float(total)
+                by_category[name] = by_category.get(name, 0.0) + float(total)
+        # Суммы по категориям точные (NUMERIC), округляем только сложение в Python
+        return money(income), money(expense), {name: money(total) for name, total in by_category.items()}
+
+    def get_expenses_by_category_from_rollup(self, user_id: int) -> List[Tuple[str, float]]:
+        """Расходы по категориям за всё время из свёртки"""
+        stmt = select(
+            Category.name,
+            func.coalesce(func.sum(MonthlyCategoryTotal.total), 0)
+        ).join(
+            Category, MonthlyCategoryTotal.category_id == Category.id
+        ).where(
+            MonthlyCategoryTotal.user_id == user_id,
+            MonthlyCategoryTotal.type == TransactionType.EXPENSE
+        ).group_by(Category.name)
+
+        return [(name, float(total)) for name, total in self.db.execute(stmt)]
+
+    def get_timeseries_from_rollup(self, user_id: int, bucket: Bucket, start: date, end: date,
+                                   by_category: bool = False) -> List[Tuple[date, Optional[str], TransactionType, float]]:
+        """То же, что get_timeseries, но из свёртки; только для интервалов от месяца и крупнее"""
+        period = cast(func.date_trunc(bucket.value, cast(MonthlyCategoryTotal.month, DateTime)), Date)
+        group = [period, MonthlyCategoryTotal.type] + ([Category.name] if by_category else [])
+        stmt = select(
+            period,
+            Category.name if by_category else null(),
+            MonthlyCategoryTotal.type,
+            func.sum(MonthlyCategoryTotal.total)
+        ).select_from(MonthlyCategoryTotal).join(
+            Category, MonthlyCategoryTotal.category_id == Category.id
+        ).where(
+            MonthlyCategoryTotal.user_id == user_id,
+            MonthlyCategoryTotal.month >= start,
+            MonthlyCategoryTotal.month < end
+        ).group_by(*group)
+
+        return [(period, name, type, float(total)) for period, name, type, total in self.db.execute(stmt)]
@@ -1,26 +1,128 @@
-from sqlalchemy.orm import Session
-from typing import TypeVar, Generic, Type, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy.orm.interfaces import ORMOption
+from typing import TypeVar, Generic, Type, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.repositories.pagination import Page, keyset_query, make_page
+from app.repositories.unit_of_work import async_unit_of_work, unit_of_work
 
 ModelType = TypeVar("ModelType")
 
+
+def loader_options(options: Sequence[ORMOption] = ()) -> Tuple[ORMOption, ...]:
+    """
+    Опции загрузки связей для запроса: переданные (selectinload/joinedload/...) поверх умолчания.
+    С raiseload по умолчанию любая не запрошенная явно связь, которой нет в identity map,
+    падает при обращении — N+1 виден сразу, а не по счёту запросов.
+    """
+    default = (raiseload("*", sql_only=True),) if settings.raiseload_enabled else ()
+    return default + tuple(options)
+
+
 class BaseRepository(Generic[ModelType]):
+    # Ключ keyset-пагинации: уникальный в конце, направление общее для всех колонок
+    keyset_columns: Tuple[str, ...] = ("id",)
+    keyset_descending: bool = False
+
     def __init__(self, db: Session, model: Type[ModelType]):
         self.db = db
         self.model = model
 
-    def get_by_id(self, id: int) -> Optional[ModelType]:
-        return self.db.query(self.model).filter(self.model.id == id).first()
+    def select(self, options: Sequence[ORMOption] = ()):
+        """SELECT модели с опциями загрузки связей (см. loader_options)"""
+        return select(self.model).options(*loader_options(options))
+
+    def get_by_id(self, id: int, options: Sequence[ORMOption] = (), for_update: bool = False) -> Optional[ModelType]:
+        """
+        for_update — SELECT ... FOR UPDATE: строка заблокирована до конца транзакции,
+        значения перечитываются поверх identity map. Вызывать внутри unit_of_work.
+        """
+        stmt = self.select(options).where(self.model.id == id)
+        if for_update:
+            stmt = stmt.with_for_update().execution_options(populate_existing=True)
+        return self.db.scalar(stmt)
+
+    def get_all(self, skip: int = 0, limit: int = 100, options: Sequence[ORMOption] = ()) -> List[ModelType]:
+        return list(self.db.scalars(self.select(options).offset(skip).limit(limit)))
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
-        return self.db.query(self.model).offset(skip).limit(limit).all()
+    def get_page(self, *filters, limit: int, cursor: Optional[str] = None,
+                 order: Optional[Tuple[Sequence[str], bool]] = None,
+                 options: Sequence[ORMOption] = ()) -> Page:
+        """
+        Страница по курсору (keyset); limit не больше PAGE_SIZE_MAX. Битый курсор — InvalidCursor.
+        order = (колонки ключа, по убыванию) заменяет порядок по умолчанию.
+        """
+        columns, descending = order or (self.keyset_columns, self.keyset_descending)
+        limit = min(limit, settings.PAGE_SIZE_MAX)
+        stmt = keyset_query(self.select(options).where(*filters), self.model, columns, descending, cursor, limit)
+        return make_page(list(self.db.scalars(stmt)), columns, limit)
 
     def create(self, **kwargs) -> ModelType:
+        """
+        INSERT ... RETURNING: id и серверные значения по умолчанию приходят тем же запросом, без refresh.
+        Внутри unit_of_work коммит откладывается до конца блока.
+        """
+        with unit_of_work(self.db):
+            return self.add(**kwargs)
+
+    def add(self, **kwargs) -> ModelType:
+        """Как create, но без коммита: объект получает id через flush, транзакция остаётся открытой"""
         obj = self.model(**kwargs)
         self.db.add(obj)
-        self.db.commit()
-        self.db.refresh(obj)
+        self.db.flush()
         return obj
 
     def delete(self, obj: ModelType) -> None:
-        self.db.delete(obj)
-        self.db.commit()
\ No newline at end of file
+        with unit_of_work(self.db):
+            self.db.delete(obj)
+            self.db.flush()
+
+
+class AsyncBaseRepository(Generic[ModelType]):
+    """Тот же репозиторий поверх AsyncSession: запросы не блокируют event loop"""
+
+    keyset_columns: Tuple[str, ...] = ("id",)
+    keyset_descending: bool = False
+
+    def __init__(self, db: AsyncSession, model: Type[ModelType]):
+        self.db = db
+        self.model = model
+
+    def select(self, options: Sequence[ORMOption] = ()):
+        # В async ленивая загрузка всё равно невозможна; raiseload даёт понятную ошибку вместо MissingGreenlet
+        return select(self.model).options(*loader_options(options))
+
+    async def get_by_id(self, id: int, options: Sequence[ORMOption] = ()) -> Optional[ModelType]:
+        return await self.db.get(self.model, id, options=loader_options(options))
+
+    async def get_all(self, skip: int = 0, limit: int = 100, options: Sequence[ORMOption] = ()) -> List[ModelType]:
+        result = await self.db.scalars(self.select(options).offset(skip).limit(limit))
+        return list(result)
+
+    async def get_page(self, *filters, limit: int, cursor: Optional[str] = None,
+                       order: Optional[Tuple[Sequence[str], bool]] = None,
+                       options: Sequence[ORMOption] = ()) -> Page:
+        columns, descending = order or (self.keyset_columns, self.keyset_descending)
+        limit = min(limit, settings.PAGE_SIZE_MAX)
+        stmt = keyset_query(self.select(options).where(*filters), self.model, columns, descending, cursor, limit)
+        return make_page(list(await self.db.scalars(stmt)), columns, limit)
+
+    async def create(self, **kwargs) -> ModelType:
+        async with async_unit_of_work(self.db):
+            obj = self.model(**kwargs)
+            self.db.add(obj)
+            await self.db.flush()
+        return obj
+
+    async def update(self, obj: ModelType, **kwargs) -> ModelType:
+        async with async_unit_of_work(self.db):
+            for key, value in kwargs.items():
+                setattr(obj, key, value)
+            await self.db.flush()
+        return obj
+
+    async def delete(self, obj: ModelType) -> None:
+        async with async_unit_of_work(self.db):
+            await self.db.delete(obj)
+            await self.db.flush()
@@ -0,0 +1,54 @@
+import csv
+import io
+from operator import itemgetter
+from typing import List, Optional, Sequence
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session
+
+
+def supports_copy(db: Session) -> bool:
+    """COPY доступен только для PostgreSQL через psycopg2"""
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg2"
+
+
+def copy_rows(db: Session, table: Table, columns: Sequence[str], rows: List[dict]) -> int:
+    """
+    Заливает строки через COPY FROM STDIN в текущей транзакции сессии.
+    None пишется как пустое поле и становится NULL.
+    """
+    values = map(itemgetter(*columns), rows)
+    # Типы с преобразованием на стороне Python (Enum -> имя члена) — как при обычном INSERT
+    dialect = db.get_bind().dialect
+    processors = [table.c[name].type.bind_processor(dialect) for name in columns]
+    if any(processors):
+        values = ([process(v) if process else v for process, v in zip(processors, row)] for row in values)
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(values)
+    buffer.seek(0)
+
+    dbapi_connection = db.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    return len(rows)
+
+
+def insert_rows(db: Session, table: Table, rows: List[dict]) -> int:
+    """Core INSERT пачкой (executemany / insertmanyvalues), без ORM-объектов"""
+    db.execute(insert(table), rows)
+    return len(rows)
+
+
+def bulk_insert(db: Session, table: Table, rows: List[dict], use_copy: Optional[bool] = None) -> int:
+    """Вставляет строки самым быстрым доступным способом. Коммит остаётся за вызывающим"""
+    if not rows:
+        return 0
+    if use_copy is None:
+        use_copy = supports_copy(db)
+    if use_copy:
+        return copy_rows(db, table, list(rows[0].keys()), rows)
+    return insert_rows(db, table, rows)
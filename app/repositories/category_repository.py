@@ -8,10 +8,21 @@ class CategoryRepository(BaseRepository[Category]):
         super().__init__(db, Category)
 
     def get_by_user(self, user_id: int) -> List[Category]:
-        return self.db.query(Category).filter(Category.user_id == user_id).all()
+        # По id: при совпадении имён в CategoryIndex выигрывает всегда одна и та же (старшая) категория
+        return self.db.query(Category).filter(Category.user_id == user_id).order_by(Category.id).all()
 
     def get_by_name_and_user(self, name: str, user_id: int) -> Optional[Category]:
         return self.db.query(Category).filter(
             Category.name == name,
             Category.user_id == user_id
-        ).first()
\ No newline at end of file
+        ).first()
+
+    def get_default_for_user(self, user_id: int) -> Optional[Category]:
+        # Сначала дефолтная категория пользователя, иначе первая созданная — одна и та же при каждом импорте
+        default = self.db.query(Category).filter(
+            Category.user_id == user_id,
+            Category.is_default == True
+        ).order_by(Category.id).first()
+        if default:
+            return default
+        return self.db.query(Category).filter(Category.user_id == user_id).order_by(Category.id).first()
\ No newline at end of file
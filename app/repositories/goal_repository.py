@@ -0,0 +1,19 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.goal import Goal
+from app.repositories.base import AsyncBaseRepository
+from typing import List, Optional
+
+class GoalRepository(AsyncBaseRepository[Goal]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, Goal)
+
+    async def get_by_user(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Goal]:
+        result = await self.db.scalars(
+            self.select().where(Goal.user_id == user_id).offset(skip).limit(limit)
+        )
+        return list(result)
+
+    async def get_by_id_and_user(self, goal_id: int, user_id: int) -> Optional[Goal]:
+        return await self.db.scalar(
+            self.select().where(Goal.id == goal_id, Goal.user_id == user_id)
+        )
@@ -0,0 +1,84 @@
+import base64
+import binascii
+import json
+import math
+from datetime import date, datetime
+from typing import Any, Generic, List, NamedTuple, Optional, Sequence, TypeVar
+from sqlalchemy import Date, DateTime, Integer, String, tuple_
+
+ModelType = TypeVar("ModelType")
+
+
+class InvalidCursor(ValueError):
+    """Курсор повреждён или выдан для другого списка"""
+
+
+class Page(NamedTuple, Generic[ModelType]):
+    items: List[ModelType]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(columns: Sequence[str], values: Sequence[Any]) -> str:
+    """Непрозрачный курсор: значения ключа последней строки страницы"""
+    payload = {"k": list(columns), "v": [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _cursor_value(column_type, value: Any) -> Any:
+    """Значение из курсора в тип колонки; чужой тип — TypeError, а не ошибка БД при сравнении"""
+    if isinstance(column_type, (DateTime, Date)):
+        if not isinstance(value, str):
+            raise TypeError("Expected ISO date")
+        return datetime.fromisoformat(value) if isinstance(column_type, DateTime) else date.fromisoformat(value)
+    if isinstance(column_type, String):
+        if not isinstance(value, str):
+            raise TypeError("Expected string")
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise TypeError("Expected number")
+    if isinstance(column_type, Integer):
+        if value != int(value):
+            raise TypeError("Expected integer")
+        return int(value)
+    # Numeric/Float и вычисляемые ключи (например, ранг поиска) — число
+    return float(value)
+
+
+def decode_cursor(model, columns: Sequence[str], token: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        if payload["k"] != list(columns) or len(payload["v"]) != len(columns):
+            raise InvalidCursor("Cursor does not match this listing")
+        return [
+            _cursor_value(getattr(getattr(model, name, None), "type", None), value)
+            for name, value in zip(columns, payload["v"])
+        ]
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError, OverflowError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+
+
+def keyset_query(stmt, model, columns: Sequence[str], descending: bool, cursor: Optional[str], limit: int):
+    """
+    Добавляет к запросу ORDER BY по ключу и условие «после курсора» вида (date, id) < (:date, :id).
+    Страница с любым номером — это поиск по индексу и limit строк, без OFFSET.
+    Берём на одну строку больше, чтобы понять, есть ли следующая страница.
+    """
+    keys = [getattr(model, name) for name in columns]
+    if cursor:
+        after = tuple_(*keys)
+        values = tuple_(*decode_cursor(model, columns, cursor))
+        stmt = stmt.where(after < values if descending else after > values)
+    order = [key.desc() for key in keys] if descending else keys
+    return stmt.order_by(*order).limit(limit + 1)
+
+
+def make_page(rows: List[ModelType], columns: Sequence[str], limit: int) -> Page:
+    if len(rows) <= limit:
+        return Page(rows, None)
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(columns, [getattr(last, name) for name in columns]))
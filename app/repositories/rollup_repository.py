@@ -0,0 +1,150 @@
+from typing import Iterable, List, Optional
+from sqlalchemy import Date, DateTime, Enum as SQLEnum, Integer, and_, cast, column, delete, func, literal, or_, select, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.models.enums import TransactionType
+from app.models.types import Money
+from app.models.monthly_category_total import MonthlyCategoryTotal
+from app.models.transaction import Transaction
+
+ROLLUP_KEY = ["user_id", "month", "category_id", "type"]
+ROLLUP_COLUMNS = ROLLUP_KEY + ["total", "count"]
+
+
+def month_of(date_column):
+    """Первое число месяца по UTC — так же, как /analytics/monthly режет месяцы"""
+    return cast(func.date_trunc("month", func.timezone("UTC", date_column)), Date)
+
+
+class RollupRepository:
+    """Инкрементальная свёртка monthly_category_totals. Коммит остаётся за вызывающим"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _upsert(self, source) -> None:
+        stmt = pg_insert(MonthlyCategoryTotal).from_select(ROLLUP_COLUMNS, source)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=ROLLUP_KEY,
+            set_={
+                "total": MonthlyCategoryTotal.total + stmt.excluded.total,
+                "count": MonthlyCategoryTotal.count + stmt.excluded.count,
+            }
+        )
+        self.db.execute(stmt)
+
+    def _drop_empty(self, user_id: int) -> None:
+        self.db.execute(delete(MonthlyCategoryTotal).where(
+            MonthlyCategoryTotal.user_id == user_id,
+            MonthlyCategoryTotal.count <= 0
+        ))
+
+    def apply_transactions(self, user_id: int, transaction_ids: Iterable[int], sign: int = 1) -> None:
+        """
+        Добавляет (sign=1) или вычитает (sign=-1) транзакции из свёртки по их текущему состоянию в БД.
+        Вычитать нужно до удаления/изменения строки, добавлять — после вставки/изменения.
+        """
+        ids = list(transaction_ids)
+        if not ids:
+            return
+        month = month_of(Transaction.date)
+        source = select(
+            Transaction.user_id,
+            month,
+            Transaction.category_id,
+            Transaction.type,
+            sign * func.sum(Transaction.amount),
+            sign * func.count()
+        ).where(
+            Transaction.user_id == user_id,
+            Transaction.id.in_(ids)
+        ).group_by(Transaction.user_id, month, Transaction.category_id, Transaction.type)
+
+        self._upsert(source)
+        if sign < 0:
+            self._drop_empty(user_id)
+
+    def apply_rows(self, user_id: int, rows: List[dict]) -> None:
+        """Добавляет в свёртку только что вставленные строки (импорт через COPY не возвращает id)"""
+        if not rows:
+            return
+        batch = values(
+            column("category_id", Integer),
+            column("type", SQLEnum(TransactionType)),
+            column("date", DateTime(timezone=True)),
+            column("amount", Money()),
+            name="batch"
+        ).data([(row["category_id"], row["type"], row["date"], row["amount"]) for row in rows])
+
+        date = cast(batch.c.date, DateTime(timezone=True))
+        month = month_of(date)
+        source = select(
+            literal(user_id, Integer),
+            month,
+            batch.c.category_id,
+            cast(batch.c.type, SQLEnum(TransactionType)),
+            # Округление до копеек — как при записи в transactions.amount
+            func.sum(cast(batch.c.amount, Money())),
+            func.count()
+        ).group_by(month, batch.c.category_id, batch.c.type)
+
+        self._upsert(source)
+
+    def _raw_totals(self, user_id: Optional[int] = None):
+        month = month_of(Transaction.date)
+        stmt = select(
+            Transaction.user_id.label("user_id"),
+            month.label("month"),
+            Transaction.category_id.label("category_id"),
+            Transaction.type.label("type"),
+            func.sum(Transaction.amount).label("total"),
+            func.count().label("count")
+        ).group_by(Transaction.user_id, month, Transaction.category_id, Transaction.type)
+        if user_id is not None:
+            stmt = stmt.where(Transaction.user_id == user_id)
+        return stmt
+
+    def rebuild(self, user_id: Optional[int] = None) -> int:
+        """Пересобирает свёртку из сырых транзакций (бэкфилл или починка)"""
+        clear = delete(MonthlyCategoryTotal)
+        if user_id is not None:
+            clear = clear.where(MonthlyCategoryTotal.user_id == user_id)
+        self.db.execute(clear)
+        result = self.db.execute(
+            pg_insert(MonthlyCategoryTotal).from_select(ROLLUP_COLUMNS, self._raw_totals(user_id))
+        )
+        return result.rowcount
+
+    def find_mismatches(self, user_id: Optional[int] = None) -> List[dict]:
+        """Сверяет свёртку с сырыми данными; пустой список — всё согласовано"""
+        raw = self._raw_totals(user_id).subquery("raw")
+        rollup = select(MonthlyCategoryTotal)
+        if user_id is not None:
+            rollup = rollup.where(MonthlyCategoryTotal.user_id == user_id)
+        rollup = rollup.subquery("rollup")
+
+        stmt = select(
+            func.coalesce(raw.c.user_id, rollup.c.user_id).label("user_id"),
+            func.coalesce(raw.c.month, rollup.c.month).label("month"),
+            func.coalesce(raw.c.category_id, rollup.c.category_id).label("category_id"),
+            func.coalesce(raw.c.type, rollup.c.type).label("type"),
+            raw.c.total.label("raw_total"),
+            rollup.c.total.label("rollup_total"),
+            raw.c.count.label("raw_count"),
+            rollup.c.count.label("rollup_count")
+        ).select_from(
+            raw.join(rollup, and_(*[raw.c[key] == rollup.c[key] for key in ROLLUP_KEY]), full=True)
+        ).where(or_(
+            raw.c.count.is_distinct_from(rollup.c.count),
+            raw.c.total.is_distinct_from(rollup.c.total)
+        ))
+
+        return [dict(row._mapping) for row in self.db.execute(stmt)]
+
+    def retype_category(self, category_id: int, type: TransactionType) -> None:
+        """Категория сменила тип — строки свёртки переезжают вместе с ней"""
+        self.db.execute(
+            update(MonthlyCategoryTotal)
+            .where(MonthlyCategoryTotal.category_id == category_id)
+            .values(type=type)
+        )
@@ -1,13 +1,162 @@
+from sqlalchemy import and_, cast, delete, func, insert, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, REGCONFIG
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import Session
-from app.models.transaction import Transaction
-from app.repositories.base import BaseRepository
-from typing import List
-from datetime import date
+from sqlalchemy.orm.interfaces import ORMOption
+from app.models.transaction import SEARCH_CONFIG, Transaction
+from app.models.category import Category
+from app.models.enums import TransactionType
+from app.repositories.base import BaseRepository, loader_options
+from app.repositories.bulk import bulk_insert, supports_copy
+from app.repositories.pagination import Page, decode_cursor, encode_cursor
+from app.core.config import settings
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set
+from datetime import date, datetime, time, timedelta, timezone
+
+# Порядок списка -> (колонки keyset-ключа, по убыванию)
+TRANSACTION_SORTS = {
+    "-date": (("date", "id"), True),
+    "date": (("date", "id"), False),
+    "-amount": (("amount", "id"), True),
+    "amount": (("amount", "id"), False),
+}
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+class TransactionQuery:
+    """
+    Составной фильтр транзакций пользователя: каждый метод добавляет условие,
+    все условия уходят в один SQL-запрос. Методы возвращают self, чтобы их можно было цеплять.
+    """
+
+    def __init__(self, user_id: int):
+        self.filters = [Transaction.user_id == user_id]
+        self.sort = "-date"
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None) -> "TransactionQuery":
+        """Даты включительно, по UTC; любая из границ может отсутствовать"""
+        if start:
+            self.filters.append(Transaction.date >= _day_start(start))
+        if end:
+            self.filters.append(Transaction.date < _day_start(end + timedelta(days=1)))
+        return self
+
+    def in_categories(self, category_ids: Optional[Iterable[int]]) -> "TransactionQuery":
+        if category_ids:
+            self.filters.append(Transaction.category_id.in_(list(category_ids)))
+        return self
+
+    def amount_between(self, min_amount: Optional[float] = None,
+                       max_amount: Optional[float] = None) -> "TransactionQuery":
+        if min_amount is not None:
+            self.filters.append(Transaction.amount >= min_amount)
+        if max_amount is not None:
+            self.filters.append(Transaction.amount <= max_amount)
+        return self
+
+    def of_type(self, type: Optional[TransactionType]) -> "TransactionQuery":
+        if type:
+            self.filters.append(Transaction.type == type)
+        return self
+
+    def search(self, text: Optional[str]) -> "TransactionQuery":
+        """Подстрока в описании без учёта регистра"""
+        if text:
+            self.filters.append(Transaction.description.icontains(text, autoescape=True))
+        return self
+
+    def order(self, sort: Optional[str]) -> "TransactionQuery":
+        if sort:
+            if sort not in TRANSACTION_SORTS:
+                raise ValueError(f"Unknown sort: {sort}")
+            self.sort = sort
+        return self
+
 
 class TransactionRepository(BaseRepository[Transaction]):
+    # Новые сначала; id различает транзакции с одинаковой датой
+    keyset_columns = ("date", "id")
+    keyset_descending = True
+
     def __init__(self, db: Session):
         super().__init__(db, Transaction)
 
+    @staticmethod
+    def _category_available(user_id: int):
+        """Категория пользователя или общая (без владельца)"""
+        return or_(Category.user_id == user_id, and_(Category.user_id.is_(None), Category.is_default.is_(True)))
+
+    def category_type(self, category_id: int, user_id: int):
+        """Подзапрос типа категории пользователя (или общей, без владельца) для INSERT/UPDATE"""
+        return select(Category.type).where(
+            Category.id == category_id,
+            self._category_available(user_id)
+        ).scalar_subquery()
+
+    def category_types(self, user_id: int, category_ids: Iterable[int]) -> Dict[int, TransactionType]:
+        """Типы доступных пользователю категорий из набора — один запрос на весь пакет"""
+        ids = set(category_ids)
+        if not ids:
+            return {}
+        rows = self.db.execute(
+            select(Category.id, Category.type).where(Category.id.in_(ids), self._category_available(user_id))
+        )
+        return dict(rows.all())
+
+    def owned_ids(self, user_id: int, transaction_ids: Iterable[int], for_update: bool = False) -> Set[int]:
+        """
+        Какие из id — транзакции этого пользователя. for_update блокирует найденные строки
+        до конца транзакции (в порядке id — параллельные пакеты не ловят взаимную блокировку)
+        """
+        ids = set(transaction_ids)
+        if not ids:
+            return set()
+        stmt = select(Transaction.id).where(Transaction.user_id == user_id, Transaction.id.in_(ids))
+        if for_update:
+            stmt = stmt.order_by(Transaction.id).with_for_update()
+        return set(self.db.scalars(stmt))
+
+    def find(self, query: TransactionQuery, limit: int, cursor: Optional[str] = None,
+             options: Sequence[ORMOption] = ()) -> Page:
+        """Страница транзакций по составному фильтру — один запрос (плюс по одному на каждую selectinload)"""
+        columns, descending = TRANSACTION_SORTS[query.sort]
+        return self.get_page(*query.filters, limit=limit, cursor=cursor, order=(columns, descending),
+                             options=options)
+
+    def search(self, user_id: int, text: str, limit: int, cursor: Optional[str] = None,
+               options: Sequence[ORMOption] = ()) -> Page:
+        """
+        Поиск по описанию: совпадения полнотекстового поиска (GIN по search_vector) по рангу ts_rank_cd,
+        за ними — совпадения по подстроке (триграммный индекс, если есть pg_trgm). Курсор — (ранг, id).
+        """
+        limit = min(limit, settings.PAGE_SIZE_MAX)
+        tsquery = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), text)
+        search_vector = Transaction.__table__.c.search_vector
+        # real -> double precision: ранг точно переживает поездку через курсор и сравнение с ним
+        rank = cast(func.ts_rank_cd(search_vector, tsquery), DOUBLE_PRECISION)
+
+        stmt = select(Transaction, rank.label("rank")).options(*loader_options(options)).where(
+            Transaction.user_id == user_id,
+            or_(
+                search_vector.op("@@")(tsquery),
+                Transaction.description.icontains(text, autoescape=True)
+            )
+        )
+        if cursor:
+            last_rank, last_id = decode_cursor(Transaction, ("rank", "id"), cursor)
+            stmt = stmt.where(tuple_(rank, Transaction.id) < tuple_(last_rank, last_id))
+        stmt = stmt.order_by(rank.desc(), Transaction.id.desc()).limit(limit + 1)
+
+        rows = list(self.db.execute(stmt))
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(("rank", "id"), [rows[-1].rank, rows[-1].Transaction.id])
+        return Page([row.Transaction for row in rows], next_cursor)
+
     def get_by_user(self, user_id: int) -> List[Transaction]:
         return self.db.query(Transaction).filter(Transaction.user_id == user_id).all()
 
@@ -25,7 +174,58 @@ class TransactionRepository(BaseRepository[Transaction]):
         ).all()
 
     def get_by_type(self, user_id: int, type: str) -> List[Transaction]:
-        return self.db.query(Transaction).join(Transaction.category).filter(
+        return self.db.query(Transaction).filter(
             Transaction.user_id == user_id,
-            Category.type == type  # type: ignore
-        ).all()
\ No newline at end of file
+            Transaction.type == type
+        ).all()
+
+    def set_type_for_category(self, category_id: int, type: TransactionType) -> int:
+        """Переносит новый тип категории на все её транзакции"""
+        result = self.db.execute(
+            update(Transaction)
+            .where(Transaction.category_id == category_id)
+            .values(type=type)
+        )
+        return result.rowcount
+
+    def insert_many(self, rows: List[dict]) -> List[int]:
+        """INSERT ... RETURNING id одним multi-row запросом; id в порядке rows. Коммит — за вызывающим"""
+        if not rows:
+            return []
+        stmt = insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True)
+        return list(self.db.scalars(stmt, rows))
+
+    def update_many(self, rows: List[dict]) -> None:
+        """UPDATE по первичному ключу: в каждой строке id и изменяемые поля. Коммит — за вызывающим"""
+        if rows:
+            self.db.execute(update(Transaction), rows)
+
+    def delete_many(self, user_id: int, transaction_ids: Iterable[int]) -> int:
+        ids = list(transaction_ids)
+        if not ids:
+            return 0
+        result = self.db.execute(
+            delete(Transaction).where(Transaction.user_id == user_id, Transaction.id.in_(ids)),
+            execution_options={"synchronize_session": False}
+        )
+        return result.rowcount
+
+    def add_batch(self, rows: List[dict]) -> int:
+        """Сохраняет пачку транзакций, минуя ORM-объекты (COPY или executemany). Коммит — за вызывающим"""
+        use_copy = settings.IMPORT_USE_COPY and supports_copy(self.db)
+        return bulk_insert(self.db, Transaction.__table__, rows, use_copy=use_copy)
+
+    def stream_for_export(self, user_id: int, batch_size: int = 1000) -> Iterator[Row]:
+        """Строки транзакций пользователя через серверный курсор, по batch_size за раз"""
+        stmt = select(
+            Transaction.id,
+            Transaction.amount,
+            Transaction.description,
+            Transaction.date,
+            Transaction.category_id,
+            Transaction.user_id
+        ).where(
+            Transaction.user_id == user_id
+        ).order_by(Transaction.date.desc(), Transaction.id.desc()).execution_options(yield_per=batch_size)
+
+        yield from self.db.execute(stmt)
\ No newline at end of file
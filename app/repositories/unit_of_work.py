@@ -0,0 +1,49 @@
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+# Глубина вложенности блоков хранится в самой сессии: её видят все репозитории и сервисы запроса
+_DEPTH_KEY = "unit_of_work_depth"
+
+
+def in_unit_of_work(db: Session | AsyncSession) -> bool:
+    return db.info.get(_DEPTH_KEY, 0) > 0
+
+
+@contextmanager
+def unit_of_work(db: Session) -> Iterator[Session]:
+    """
+    Блок записи: внутри — только flush, коммит один раз при выходе из внешнего блока,
+    при исключении — откат всего блока. Вложенные блоки (сервис вызывает сервис,
+    репозиторий внутри сервиса) ничего не коммитят сами.
+    """
+    depth = db.info.get(_DEPTH_KEY, 0)
+    db.info[_DEPTH_KEY] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            db.commit()
+    except BaseException:
+        if depth == 0:
+            db.rollback()
+        raise
+    finally:
+        db.info[_DEPTH_KEY] = depth
+
+
+@asynccontextmanager
+async def async_unit_of_work(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """То же для AsyncSession"""
+    depth = db.info.get(_DEPTH_KEY, 0)
+    db.info[_DEPTH_KEY] = depth + 1
+    try:
+        yield db
+        if depth == 0:
+            await db.commit()
+    except BaseException:
+        if depth == 0:
+            await db.rollback()
+        raise
+    finally:
+        db.info[_DEPTH_KEY] = depth
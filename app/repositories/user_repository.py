@@ -1,6 +1,7 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
-from app.repositories.base import BaseRepository
+from app.repositories.base import BaseRepository, AsyncBaseRepository
 from typing import Optional
 
 class UserRepository(BaseRepository[User]):
@@ -16,4 +17,9 @@ class UserRepository(BaseRepository[User]):
     def get_by_username_or_email(self, username: str, email: str) -> Optional[User]:
         return self.db.query(User).filter(
             (User.username == username) | (User.email == email)
-        ).first()
\ No newline at end of file
+        ).first()
+
+
+class AsyncUserRepository(AsyncBaseRepository[User]):
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, User)
@@ -1,6 +1,8 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional
+from datetime import date, datetime
+from app.core.config import settings
+from app.models.enums import TransactionType
 
 
 class TransactionBase(BaseModel):
@@ -20,6 +22,36 @@ class TransactionUpdate(BaseModel):
     date: Optional[datetime] = None
 
 
+class TransactionBatchUpdate(TransactionUpdate):
+    id: int
+
+
+class TransactionBatch(BaseModel):
+    """Пакет изменений (например, офлайн-правки клиента): всё применяется одной транзакцией БД"""
+    create: List[TransactionCreate] = []
+    update: List[TransactionBatchUpdate] = []
+    delete: List[int] = []
+
+    @model_validator(mode="after")
+    def check_size(self):
+        if len(self.create) + len(self.update) + len(self.delete) > settings.TRANSACTION_BATCH_MAX:
+            raise ValueError(f"Batch must not contain more than {settings.TRANSACTION_BATCH_MAX} operations")
+        return self
+
+
+class BatchItemResult(BaseModel):
+    """Результат одной операции пакета; index — позиция в соответствующем списке запроса"""
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class TransactionBatchResult(BaseModel):
+    created: List[BatchItemResult]
+    updated: List[BatchItemResult]
+    deleted: List[BatchItemResult]
+
+
 class Transaction(TransactionBase):
     id: int
     user_id: int
@@ -27,4 +59,26 @@ class Transaction(TransactionBase):
 
     model_config = {
         "from_attributes": True
-    }
\ No newline at end of file
+    }
+
+
+class TransactionFilter(BaseModel):
+    """Фильтры и страница списка транзакций (query-параметры); все условия применяются вместе"""
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    category_id: Optional[List[int]] = None
+    min_amount: Optional[float] = Field(None, ge=0)
+    max_amount: Optional[float] = Field(None, ge=0)
+    type: Optional[TransactionType] = None
+    q: Optional[str] = Field(None, min_length=1, max_length=200)
+    sort: Literal["-date", "date", "-amount", "amount"] = "-date"
+    limit: int = Field(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX)
+    cursor: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            raise ValueError("start_date must not be after end_date")
+        if self.min_amount is not None and self.max_amount is not None and self.min_amount > self.max_amount:
+            raise ValueError("min_amount must not be greater than max_amount")
+        return self
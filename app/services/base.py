@@ -1,5 +1,5 @@
 from typing import TypeVar, Generic, List, Optional
-from app.repositories.base import BaseRepository
+from app.repositories.base import BaseRepository, AsyncBaseRepository
 
 ModelType = TypeVar("ModelType")
 
@@ -17,4 +17,21 @@ class BaseService(Generic[ModelType]):
         return self.repository.create(**kwargs)
 
     def delete(self, obj: ModelType) -> None:
-        self.repository.delete(obj)
\ No newline at end of file
+        self.repository.delete(obj)
+
+
+class AsyncBaseService(Generic[ModelType]):
+    def __init__(self, repository: AsyncBaseRepository[ModelType]):
+        self.repository = repository
+
+    async def get_by_id(self, id: int) -> Optional[ModelType]:
+        return await self.repository.get_by_id(id)
+
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[ModelType]:
+        return await self.repository.get_all(skip, limit)
+
+    async def create(self, **kwargs) -> ModelType:
+        return await self.repository.create(**kwargs)
+
+    async def delete(self, obj: ModelType) -> None:
+        await self.repository.delete(obj)
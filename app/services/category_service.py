@@ -1,14 +1,21 @@
 from app.repositories.category_repository import CategoryRepository
+from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.rollup_repository import RollupRepository
+from app.repositories.unit_of_work import unit_of_work
 from app.services.base import BaseService
+from app.core.analytics_cache import invalidate_user_analytics
 from app.models.category import Category
 from fastapi import HTTPException, status
-from typing import List
+from typing import List, Optional
 
 
 class CategoryService(BaseService[Category]):
-    def __init__(self, repository: CategoryRepository):
+    def __init__(self, repository: CategoryRepository, transaction_repository: TransactionRepository,
+                 rollup_repository: RollupRepository):
         super().__init__(repository)
         self.repository = repository
+        self.transaction_repository = transaction_repository
+        self.rollup_repository = rollup_repository
 
     def get_user_categories(self, user_id: int) -> List[Category]:
         return self.repository.get_by_user(user_id)
@@ -22,8 +29,38 @@ class CategoryService(BaseService[Category]):
                 detail="Category with this name already exists"
             )
 
-        return self.create(
+        category = self.create(
             name=name,
             type=type,
             user_id=user_id
-        )
\ No newline at end of file
+        )
+        invalidate_user_analytics(user_id)
+        return category
+
+    def update_category(self, category_id: int, user_id: int, name: Optional[str] = None,
+                        type: Optional[str] = None) -> Category:
+        category = self.get_by_id(category_id)
+        if not category or category.user_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Category not found"
+            )
+
+        with unit_of_work(self.repository.db):
+            if name is not None and name != category.name:
+                if self.repository.get_by_name_and_user(name, user_id):
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Category with this name already exists"
+                    )
+                category.name = name
+
+            if type is not None and type != category.type:
+                # Тип хранится и в транзакциях, и в свёртке — меняем всё в одной транзакции БД
+                category.type = type
+                self.repository.db.flush()
+                self.transaction_repository.set_type_for_category(category.id, category.type)
+                self.rollup_repository.retype_category(category.id, category.type)
+
+        invalidate_user_analytics(user_id)
+        return category
@@ -0,0 +1,46 @@
+from app.repositories.goal_repository import GoalRepository
+from app.services.base import AsyncBaseService
+from app.models.goal import Goal
+from fastapi import HTTPException, status
+from typing import List, Optional
+from datetime import datetime, timezone
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # goals.deadline — timestamp без зоны, asyncpg не приводит aware-даты сам
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class GoalService(AsyncBaseService[Goal]):
+    def __init__(self, repository: GoalRepository):
+        super().__init__(repository)
+        self.repository = repository
+
+    async def get_user_goals(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Goal]:
+        return await self.repository.get_by_user(user_id, skip, limit)
+
+    async def get_user_goal(self, goal_id: int, user_id: int) -> Goal:
+        goal = await self.repository.get_by_id_and_user(goal_id, user_id)
+        if not goal:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Goal not found"
+            )
+        return goal
+
+    async def create_goal(self, user_id: int, **kwargs) -> Goal:
+        if "deadline" in kwargs:
+            kwargs["deadline"] = _naive_utc(kwargs["deadline"])
+        return await self.create(user_id=user_id, **kwargs)
+
+    async def update_goal(self, goal_id: int, user_id: int, **kwargs) -> Goal:
+        goal = await self.get_user_goal(goal_id, user_id)
+        if "deadline" in kwargs:
+            kwargs["deadline"] = _naive_utc(kwargs["deadline"])
+        return await self.repository.update(goal, **kwargs)
+
+    async def delete_goal(self, goal_id: int, user_id: int) -> None:
+        goal = await self.get_user_goal(goal_id, user_id)
+        await self.delete(goal)
@@ -0,0 +1,113 @@
+from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.category_repository import CategoryRepository
+from app.repositories.rollup_repository import RollupRepository
+from app.services.base import BaseService
+from app.models.transaction import Transaction
+from app.models.category import Category
+from app.core.config import settings
+from app.core.analytics_cache import invalidate_user_analytics
+from app.utils.category_index import CategoryIndex
+from app.utils.csv_handler import IMPORT_REQUIRED_FIELDS, open_csv_reader, iter_import_rows, iter_batches
+from fastapi import HTTPException, status
+from sqlalchemy.exc import SQLAlchemyError
+from typing import BinaryIO
+
+
+class _ErrorLog(list):
+    """Список ошибок импорта: считает все, но хранит не больше limit"""
+
+    def __init__(self, limit: int):
+        super().__init__()
+        self.limit = limit
+        self.total = 0
+
+    def append(self, message: str) -> None:
+        self.total += 1
+        if len(self) < self.limit:
+            super().append(message)
+
+
+class ImportService(BaseService[Transaction]):
+    def __init__(self, repository: TransactionRepository, category_repository: CategoryRepository,
+                 rollup_repository: RollupRepository):
+        super().__init__(repository)
+        self.repository = repository
+        self.category_repository = category_repository
+        self.rollup_repository = rollup_repository
+
+    def get_or_create_default_category(self, user_id: int) -> Category:
+        category = self.category_repository.get_default_for_user(user_id)
+        if category:
+            return category
+
+        # Если вообще нет категорий — создаём "Uncategorized"
+        return self.category_repository.create(
+            name="Uncategorized",
+            type="expense",
+            user_id=user_id,
+            is_default=True
+        )
+
+    def import_csv(self, user_id: int, stream: BinaryIO) -> dict:
+        """
+        Потоковый импорт: файл читается и валидируется построчно,
+        в БД уходят пачки по CSV_IMPORT_BATCH_SIZE строк, каждая со своим коммитом
+        вместе с приращением месячной свёртки.
+        """
+        default_category = self.get_or_create_default_category(user_id)
+        # Все категории пользователя грузим один раз на весь импорт
+        categories = CategoryIndex(self.category_repository.get_by_user(user_id))
+
+        reader = open_csv_reader(stream)
+        try:
+            fieldnames = reader.fieldnames or []
+        except UnicodeDecodeError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CSV file must be UTF-8 encoded"
+            )
+
+        # Проверка заголовков
+        if not all(field in fieldnames for field in IMPORT_REQUIRED_FIELDS):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"CSV must contain columns: {IMPORT_REQUIRED_FIELDS}"
+            )
+
+        errors = _ErrorLog(settings.CSV_IMPORT_MAX_ERRORS)
+        imported = 0
+
+        try:
+            rows = iter_import_rows(reader, errors)
+            for batch in iter_batches(rows, settings.CSV_IMPORT_BATCH_SIZE):
+                values = []
+                for _, data in batch:
+                    category = categories.resolve(data.pop('category_id'), data.pop('category_name'))
+                    category = category or default_category
+                    values.append({
+                        **data,
+                        'category_id': category.id,
+                        'type': category.type,
+                        'user_id': user_id
+                    })
+
+                try:
+                    count = self.repository.add_batch(values)
+                    self.rollup_repository.apply_rows(user_id, values)
+                    self.repository.db.commit()
+                    imported += count
+                except SQLAlchemyError as e:
+                    # Пачка падает целиком, уже сохранённые пачки остаются
+                    self.repository.db.rollback()
+                    errors.append(f"Rows {batch[0][0]}-{batch[-1][0]}: {getattr(e, 'orig', None) or e}")
+        except UnicodeDecodeError as e:
+            errors.append(f"File decoding stopped: {e.reason}")
+        finally:
+            # Даже при ошибке часть пачек (и категория по умолчанию) уже могла попасть в БД
+            invalidate_user_analytics(user_id)
+
+        return {
+            "message": f"Imported {imported} transactions, {errors.total} errors",
+            "imported": imported,
+            "errors": list(errors)
+        }
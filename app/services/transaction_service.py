@@ -1,19 +1,45 @@
-from app.repositories.transaction_repository import TransactionRepository
+from app.repositories.transaction_repository import TransactionQuery, TransactionRepository
+from app.repositories.rollup_repository import RollupRepository
+from app.repositories.pagination import InvalidCursor, Page
+from app.repositories.unit_of_work import unit_of_work
 from app.services.base import BaseService
+from app.core.analytics_cache import invalidate_user_analytics
 from app.models.transaction import Transaction
+from app.schemas.transaction import TransactionBatch, TransactionFilter
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
-from datetime import date
+from datetime import date, datetime, timezone
+
+BATCH_CONFLICT = "Batch conflicts with concurrent changes, nothing was applied"
 
 
 class TransactionService(BaseService[Transaction]):
-    def __init__(self, repository: TransactionRepository):
+    def __init__(self, repository: TransactionRepository, rollup_repository: RollupRepository):
         super().__init__(repository)
         self.repository = repository
+        # Месячная свёртка меняется в той же транзакции БД, что и сама запись
+        self.rollup_repository = rollup_repository
 
     def get_user_transactions(self, user_id: int) -> List[Transaction]:
         return self.repository.get_by_user(user_id)
 
+    def find_transactions(self, user_id: int, filters: TransactionFilter) -> Page:
+        query = TransactionQuery(user_id) \
+            .between(filters.start_date, filters.end_date) \
+            .in_categories(filters.category_id) \
+            .amount_between(filters.min_amount, filters.max_amount) \
+            .of_type(filters.type) \
+            .search(filters.q) \
+            .order(filters.sort)
+        try:
+            return self.repository.find(query, filters.limit, filters.cursor)
+        except InvalidCursor as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
     def get_transactions_by_category(self, user_id: int, category_id: int) -> List[Transaction]:
         # Проверим, что категория принадлежит пользователю (опционально)
         return self.repository.get_by_user_and_category(user_id, category_id)
@@ -21,6 +47,15 @@ class TransactionService(BaseService[Transaction]):
     def get_transactions_by_date_range(self, user_id: int, start_date: date, end_date: date) -> List[Transaction]:
         return self.repository.get_by_date_range(user_id, start_date, end_date)
 
+    def search_transactions(self, user_id: int, q: str, limit: int, cursor: Optional[str] = None) -> Page:
+        try:
+            return self.repository.search(user_id, q, limit, cursor)
+        except InvalidCursor as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
     def create_transaction(self, user_id: int, amount: float, description: str,
                            category_id: int, transaction_date: date) -> Transaction:
         # Валидация суммы
@@ -30,19 +65,35 @@ class TransactionService(BaseService[Transaction]):
                 detail="Amount must be positive"
             )
 
-        # Здесь можно добавить проверку существования категории
-        # и её принадлежности пользователю
+        # Тип копируется из категории тем же INSERT; чужая или несуществующая категория даёт NULL.
+        # Запись и свёртка — один коммит; id, дата и тип возвращаются тем же INSERT ... RETURNING
+        with unit_of_work(self.repository.db):
+            try:
+                transaction = self.repository.add(
+                    user_id=user_id,
+                    amount=amount,
+                    description=description,
+                    category_id=category_id,
+                    type=self.repository.category_type(category_id, user_id),
+                    date=transaction_date
+                )
+            except IntegrityError:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Category not found"
+                )
+            self.rollup_repository.apply_transactions(user_id, [transaction.id])
 
-        return self.create(
-            user_id=user_id,
-            amount=amount,
-            description=description,
-            category_id=category_id,
-            date=transaction_date
-        )
+        invalidate_user_analytics(user_id)
+        return transaction
 
-    def update_transaction(self, transaction_id: int, user_id: int, **kwargs) -> Optional[Transaction]:
-        transaction = self.get_by_id(transaction_id)
+    def _get_locked(self, transaction_id: int, user_id: int) -> Transaction:
+        """
+        Транзакция пользователя под блокировкой строки: параллельное изменение или удаление
+        той же записи (например, повтор запроса клиентом) ждёт коммита и видит уже новое
+        состояние — старое не вычитается из свёртки дважды. Вызывать внутри unit_of_work.
+        """
+        transaction = self.repository.get_by_id(transaction_id, for_update=True)
 
         # Проверяем, что транзакция существует и принадлежит пользователю
         if not transaction or transaction.user_id != user_id:
@@ -50,23 +101,130 @@ class TransactionService(BaseService[Transaction]):
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Transaction not found"
             )
+        return transaction
+
+    def update_transaction(self, transaction_id: int, user_id: int, **kwargs) -> Optional[Transaction]:
+        with unit_of_work(self.repository.db):
+            transaction = self._get_locked(transaction_id, user_id)
 
-        # Обновляем поля
-        for key, value in kwargs.items():
-            if hasattr(transaction, key) and value is not None:
-                setattr(transaction, key, value)
+            # Старое состояние вычитаем из свёртки, новое — добавляем
+            self.rollup_repository.apply_transactions(user_id, [transaction.id], sign=-1)
 
-        self.repository.db.commit()
-        self.repository.db.refresh(transaction)
+            # Обновляем поля
+            for key, value in kwargs.items():
+                if hasattr(transaction, key) and value is not None:
+                    setattr(transaction, key, value)
+            if kwargs.get("category_id") is not None:
+                transaction.type = self.repository.category_type(kwargs["category_id"], user_id)
+
+            try:
+                self.repository.db.flush()
+            except IntegrityError:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Category not found"
+                )
+            self.rollup_repository.apply_transactions(user_id, [transaction.id])
+
+        invalidate_user_analytics(user_id)
         return transaction
 
     def delete_transaction(self, transaction_id: int, user_id: int) -> None:
-        transaction = self.get_by_id(transaction_id)
+        with unit_of_work(self.repository.db):
+            transaction = self._get_locked(transaction_id, user_id)
+            self.rollup_repository.apply_transactions(user_id, [transaction.id], sign=-1)
+            self.delete(transaction)
+        invalidate_user_analytics(user_id)
 
-        if not transaction or transaction.user_id != user_id:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Transaction not found"
-            )
+    def apply_batch(self, user_id: int, batch: TransactionBatch) -> dict:
+        """
+        Пакет созданий, изменений и удалений. Проверка — одним проходом: один запрос на категории
+        и один на принадлежность транзакций. Ошибочные операции пропускаются и возвращаются с error,
+        остальные применяются одной транзакцией БД; все вставки — одним INSERT ... RETURNING.
+        """
+        category_types = self.repository.category_types(
+            user_id,
+            [item.category_id for item in batch.create]
+            + [item.category_id for item in batch.update if item.category_id is not None]
+        )
+        owned = self.repository.owned_ids(user_id, [item.id for item in batch.update] + batch.delete)
+
+        created, updated, deleted = [], [], []
+        new_rows, changed_rows, removed_ids = [], [], []
+        seen = set()
+        now = datetime.now(timezone.utc)
+
+        for index, item in enumerate(batch.create):
+            if item.category_id not in category_types:
+                created.append({"index": index, "error": "Category not found"})
+                continue
+            created.append({"index": index})
+            new_rows.append({
+                "user_id": user_id,
+                "amount": item.amount,
+                "description": item.description,
+                "category_id": item.category_id,
+                "type": category_types[item.category_id],
+                "date": item.date or now,
+            })
+
+        # Одна транзакция — не больше одной операции изменения/удаления за пакет
+        for index, item in enumerate(batch.update):
+            error = self._batch_target_error(item.id, owned, seen)
+            if error is None and item.category_id is not None and item.category_id not in category_types:
+                error = "Category not found"
+            if error:
+                updated.append({"index": index, "id": item.id, "error": error})
+                continue
+            seen.add(item.id)
+            values = {key: value for key, value in item.model_dump(exclude_unset=True).items() if value is not None}
+            if "category_id" in values:
+                values["type"] = category_types[values["category_id"]]
+            updated.append({"index": index, "id": item.id})
+            changed_rows.append(values)
+
+        for index, transaction_id in enumerate(batch.delete):
+            error = self._batch_target_error(transaction_id, owned, seen)
+            if error:
+                deleted.append({"index": index, "id": transaction_id, "error": error})
+                continue
+            seen.add(transaction_id)
+            deleted.append({"index": index, "id": transaction_id})
+            removed_ids.append(transaction_id)
+
+        if not (new_rows or changed_rows or removed_ids):
+            return {"created": created, "updated": updated, "deleted": deleted}
+
+        changed_ids = [row["id"] for row in changed_rows]
+        try:
+            with unit_of_work(self.repository.db):
+                # Изменяемые и удаляемые строки блокируются до вычитания из свёртки: если их уже
+                # удалил параллельный запрос, пакет не применяется — иначе вычли бы дважды
+                targets = changed_ids + removed_ids
+                if len(self.repository.owned_ids(user_id, targets, for_update=True)) != len(targets):
+                    raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=BATCH_CONFLICT)
+                # Старое состояние изменяемых и удаляемых — из свёртки, новое — после записи
+                self.rollup_repository.apply_transactions(user_id, targets, sign=-1)
+                self.repository.delete_many(user_id, removed_ids)
+                self.repository.update_many(changed_rows)
+                new_ids = self.repository.insert_many(new_rows)
+                self.rollup_repository.apply_transactions(user_id, changed_ids + new_ids)
+        except IntegrityError:
+            # Категорию удалили между проверкой и записью
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=BATCH_CONFLICT)
+        invalidate_user_analytics(user_id)
+
+        # id вставленных строк идут в порядке успешных элементов create
+        ids = iter(new_ids)
+        for result in created:
+            if "error" not in result:
+                result["id"] = next(ids)
+        return {"created": created, "updated": updated, "deleted": deleted}
 
-        self.delete(transaction)
\ No newline at end of file
+    @staticmethod
+    def _batch_target_error(transaction_id: int, owned: set, seen: set) -> Optional[str]:
+        if transaction_id not in owned:
+            return "Transaction not found"
+        if transaction_id in seen:
+            return "Duplicate transaction id in batch"
+        return None
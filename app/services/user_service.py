@@ -1,11 +1,13 @@
 from app.repositories.user_repository import UserRepository
+from app.repositories.unit_of_work import unit_of_work
 from app.services.base import BaseService
 from app.models.user import User
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_and_update_password, PasswordHasherBusy
 from fastapi import HTTPException, status
 from datetime import timedelta
 from app.core.config import settings
 from app.core.security import create_access_token
+from app.core.auth import token_claims, remember_user, forget_user
 
 class UserService(BaseService[User]):
     def __init__(self, repository: UserRepository):
@@ -28,7 +30,7 @@ class UserService(BaseService[User]):
             )
 
         # Хешируем пароль и создаём пользователя
-        hashed_password = get_password_hash(password)
+        hashed_password = self._run_password_op(get_password_hash, password)
         return self.create(
             username=username,
             email=email,
@@ -38,20 +40,41 @@ class UserService(BaseService[User]):
 
     def authenticate(self, username: str, password: str) -> User:
         user = self.get_by_username(username)
-        if not user or not verify_password(password, user.hashed_password):
+        verified, new_hash = False, None
+        if user:
+            verified, new_hash = self._run_password_op(verify_and_update_password, password, user.hashed_password)
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+
+        # Стоимость bcrypt поменялась — тихо перехешируем пароль при входе
+        if new_hash:
+            with unit_of_work(self.repository.db):
+                user.hashed_password = new_hash
         return user
 
+    @staticmethod
+    def _run_password_op(func, *args):
+        try:
+            return func(*args)
+        except PasswordHasherBusy:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service is busy, try again later",
+                headers={"Retry-After": "1"},
+            )
+
     def create_access_token_for_user(self, user: User) -> dict:
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": str(user.id)},
+            data=token_claims(user),
             expires_delta=access_token_expires
         )
+        # Первый запрос с новым токеном не пойдёт в БД за пользователем
+        remember_user(user)
         return {
             "access_token": access_token,
             "token_type": "bearer",
@@ -60,4 +83,16 @@ class UserService(BaseService[User]):
                 "username": user.username,
                 "email": user.email
             }
-        }
\ No newline at end of file
+        }
+
+    def revoke_tokens(self, user_id: int) -> None:
+        """Отзывает все выданные токены пользователя"""
+        with unit_of_work(self.repository.db):
+            user = self.get_by_id(user_id)
+            if user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+            user.token_version = (user.token_version or 0) + 1
+        forget_user(user_id)
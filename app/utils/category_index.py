@@ -0,0 +1,37 @@
+from typing import Dict, Iterable, Optional
+from app.models.category import Category
+
+
+def _normalize_name(name: str) -> str:
+    return name.strip().casefold()
+
+
+class CategoryIndex:
+    """Категории пользователя в памяти: поиск по id и по имени без запросов к БД"""
+
+    def __init__(self, categories: Iterable[Category]):
+        self.by_id: Dict[int, Category] = {}
+        self.by_name: Dict[str, Category] = {}
+        for category in categories:
+            self.by_id[category.id] = category
+            # При совпадении имён выигрывает первая категория
+            self.by_name.setdefault(_normalize_name(category.name), category)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, category_id: int) -> bool:
+        return category_id in self.by_id
+
+    def get(self, category_id: int) -> Optional[Category]:
+        return self.by_id.get(category_id)
+
+    def get_by_name(self, name: str) -> Optional[Category]:
+        return self.by_name.get(_normalize_name(name))
+
+    def resolve(self, category_id: Optional[int] = None, name: Optional[str] = None) -> Optional[Category]:
+        """Ищет категорию сначала по id, потом по имени"""
+        category = self.by_id.get(category_id) if category_id else None
+        if category is None and name:
+            category = self.get_by_name(name)
+        return category
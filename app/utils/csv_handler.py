@@ -1,19 +1,41 @@
 import csv
 import io
-from typing import List
+from datetime import datetime, timezone
+from itertools import islice
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+from app.core.config import settings
 from app.models.transaction import Transaction
 
+IMPORT_REQUIRED_FIELDS = ['amount', 'description', 'date']
+
+
+EXPORT_FIELDS = ['id', 'amount', 'description', 'date', 'category_id', 'user_id']
+
 
 def export_transactions_to_csv(transactions: List[Transaction]) -> str:
     """Создаёт CSV строку из списка транзакций"""
+    return ''.join(iter_transactions_csv(transactions))
+
+
+def iter_transactions_csv(transactions: Iterable, rows_per_chunk: Optional[int] = None) -> Iterator[str]:
+    """
+    Отдаёт CSV кусками: заголовок — сразу отдельным куском, до первого обращения к transactions
+    (генератор запроса начинает выполняться только при переборе), затем данные
+    по rows_per_chunk строк (по умолчанию CSV_EXPORT_BATCH_SIZE — порция серверного курсора).
+    Принимает ORM-объекты или строки результата с теми же атрибутами.
+    """
+    rows_per_chunk = rows_per_chunk or settings.CSV_EXPORT_BATCH_SIZE
     output = io.StringIO()
     writer = csv.writer(output)
 
     # Заголовки
-    writer.writerow(['id', 'amount', 'description', 'date', 'category_id', 'user_id'])
+    writer.writerow(EXPORT_FIELDS)
+    yield output.getvalue()
+    output.seek(0)
+    output.truncate()
 
     # Данные
-    for t in transactions:
+    for i, t in enumerate(transactions, start=1):
         writer.writerow([
             t.id,
             t.amount,
@@ -22,8 +44,14 @@ def export_transactions_to_csv(transactions: List[Transaction]) -> str:
             t.category_id,
             t.user_id
         ])
+        if i % rows_per_chunk == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
 
-    return output.getvalue()
+    tail = output.getvalue()
+    if tail:
+        yield tail
 
 
 def parse_csv_to_transactions(csv_content: str, user_id: int) -> List[dict]:
@@ -47,4 +75,65 @@ def parse_csv_to_transactions(csv_content: str, user_id: int) -> List[dict]:
         except (ValueError, KeyError):
             continue
 
-    return result
\ No newline at end of file
+    return result
+
+
+def open_csv_reader(stream: BinaryIO, encoding: str = 'utf-8-sig') -> csv.DictReader:
+    """Оборачивает бинарный поток в CSV-ридер, который декодирует файл кусками, а не целиком"""
+    return csv.DictReader(io.TextIOWrapper(stream, encoding=encoding, newline=''))
+
+
+def iter_import_rows(reader: Iterable[dict], errors: List[str]) -> Iterator[Tuple[int, dict]]:
+    """
+    Валидирует строки импорта по одной и отдаёт (номер строки, данные транзакции).
+    Ошибки и предупреждения дописываются в errors.
+    """
+    for i, row in enumerate(reader, start=2):  # start=2 because row 1 is header
+        try:
+            # Парсим сумму
+            amount = float(row.get('amount', 0))
+            if amount <= 0:
+                errors.append(f"Row {i}: amount must be positive")
+                continue
+
+            # Описание
+            description = (row.get('description') or '').strip()
+            if not description:
+                description = "Imported transaction"
+
+            # Парсим дату
+            date_str = row.get('date') or ''
+            try:
+                if date_str:
+                    date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+                else:
+                    date = datetime.now(timezone.utc)
+            except ValueError:
+                errors.append(f"Row {i}: invalid date format, using current date")
+                date = datetime.now(timezone.utc)
+
+            # Категория из файла: по id или по имени (обе колонки необязательны)
+            category_id = None
+            if row.get('category_id'):
+                try:
+                    category_id = int(row['category_id'])
+                except ValueError:
+                    pass
+
+            yield i, {
+                'amount': amount,
+                'description': description,
+                'date': date,
+                'category_id': category_id,
+                'category_name': (row.get('category') or '').strip() or None
+            }
+
+        except Exception as e:
+            errors.append(f"Row {i}: {str(e)}")
+
+
+def iter_batches(items: Iterable, size: int) -> Iterator[list]:
+    """Режет поток на списки длиной не больше size"""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
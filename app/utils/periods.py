@@ -0,0 +1,58 @@
+from datetime import date, timedelta
+from typing import Iterator
+from app.models.enums import Bucket
+
+
+def truncate(day: date, bucket: Bucket) -> date:
+    """Начало интервала, в который попадает day — как date_trunc в PostgreSQL (недели с понедельника)"""
+    if bucket == Bucket.DAY:
+        return day
+    if bucket == Bucket.WEEK:
+        return day - timedelta(days=day.weekday())
+    if bucket == Bucket.MONTH:
+        return day.replace(day=1)
+    if bucket == Bucket.QUARTER:
+        return date(day.year, (day.month - 1) // 3 * 3 + 1, 1)
+    return date(day.year, 1, 1)
+
+
+def next_start(start: date, bucket: Bucket) -> date:
+    """
+    Начало следующего интервала; start — уже начало интервала.
+    У последнего интервала календаря (9999 год) следующего нет — ValueError.
+    """
+    try:
+        if bucket == Bucket.DAY:
+            return start + timedelta(days=1)
+        if bucket == Bucket.WEEK:
+            return start + timedelta(days=7)
+        if bucket == Bucket.YEAR:
+            return date(start.year + 1, 1, 1)
+        months = 3 if bucket == Bucket.QUARTER else 1
+        month_index = start.month - 1 + months
+        return date(start.year + month_index // 12, month_index % 12 + 1, 1)
+    except OverflowError as e:
+        raise ValueError("Date is out of range") from e
+
+
+def iter_buckets(start: date, end: date, bucket: Bucket) -> Iterator[date]:
+    """Начала всех интервалов, пересекающихся с [start, end], включая пустые"""
+    current = truncate(start, bucket)
+    while current <= end:
+        yield current
+        current = next_start(current, bucket)
+
+
+def count_buckets(start: date, end: date, bucket: Bucket) -> int:
+    """Число интервалов без их перебора — чтобы заранее отклонить слишком длинный ряд"""
+    first, last = truncate(start, bucket), truncate(end, bucket)
+    if bucket == Bucket.DAY:
+        return (last - first).days + 1
+    if bucket == Bucket.WEEK:
+        return (last - first).days // 7 + 1
+    months = (last.year - first.year) * 12 + last.month - first.month
+    if bucket == Bucket.MONTH:
+        return months + 1
+    if bucket == Bucket.QUARTER:
+        return months // 3 + 1
+    return last.year - first.year + 1
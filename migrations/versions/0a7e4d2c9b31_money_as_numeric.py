@@ -0,0 +1,65 @@
+"""money_as_numeric
+
+Revision ID: 0a7e4d2c9b31
+Revises: f1c6a3b95e20
+Create Date: 2026-10-17 16:02:17.945120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7e4d2c9b31'
+down_revision: Union[str, Sequence[str], None] = 'f1c6a3b95e20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (таблица, колонка, точность)
+MONEY_COLUMNS = [
+    ('transactions', 'amount', 14),
+    ('goals', 'target_amount', 14),
+    ('goals', 'current_amount', 14),
+    ('monthly_category_totals', 'total', 18),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Float -> NUMERIC с округлением до копеек; каждая таблица переписывается один раз
+    for table, column, precision in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.Numeric(precision, 2),
+            existing_type=sa.Float(),
+            postgresql_using=f"round({column}::numeric, 2)"
+        )
+    # Свёртка пересчитывается из уже округлённых сумм, чтобы точно совпадать с транзакциями
+    op.execute("""
+        UPDATE monthly_category_totals m
+        SET total = raw.total
+        FROM (
+            SELECT user_id,
+                   date_trunc('month', timezone('UTC', date))::date AS month,
+                   category_id,
+                   type,
+                   sum(amount) AS total
+            FROM transactions
+            GROUP BY 1, 2, 3, 4
+        ) raw
+        WHERE m.user_id = raw.user_id AND m.month = raw.month
+          AND m.category_id = raw.category_id AND m.type = raw.type
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, precision in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.Float(),
+            existing_type=sa.Numeric(precision, 2),
+            postgresql_using=f"{column}::double precision"
+        )
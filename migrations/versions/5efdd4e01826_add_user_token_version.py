@@ -0,0 +1,28 @@
+"""add_user_token_version
+
+Revision ID: 5efdd4e01826
+Revises: ca7b9e46cb25
+Create Date: 2026-10-17 09:12:41.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5efdd4e01826'
+down_revision: Union[str, Sequence[str], None] = 'ca7b9e46cb25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,34 @@
+"""add_query_indexes
+
+Revision ID: b2820fabd357
+Revises: 5efdd4e01826
+Create Date: 2026-10-17 10:03:27.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2820fabd357'
+down_revision: Union[str, Sequence[str], None] = '5efdd4e01826'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transactions_user_id_date', 'transactions', ['user_id', sa.text('date DESC')], unique=False)
+    op.create_index('ix_transactions_user_id_category_id_date', 'transactions', ['user_id', 'category_id', 'date'], unique=False)
+    op.create_index(op.f('ix_categories_user_id'), 'categories', ['user_id'], unique=False)
+    op.create_index(op.f('ix_goals_user_id'), 'goals', ['user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_goals_user_id'), table_name='goals')
+    op.drop_index(op.f('ix_categories_user_id'), table_name='categories')
+    op.drop_index('ix_transactions_user_id_category_id_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_id_date', table_name='transactions')
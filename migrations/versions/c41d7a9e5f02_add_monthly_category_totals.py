@@ -0,0 +1,52 @@
+"""add_monthly_category_totals
+
+Revision ID: c41d7a9e5f02
+Revises: b2820fabd357
+Create Date: 2026-10-17 12:14:05.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d7a9e5f02'
+down_revision: Union[str, Sequence[str], None] = 'b2820fabd357'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('monthly_category_totals',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('type', postgresql.ENUM('INCOME', 'EXPENSE', name='transactiontype', create_type=False), nullable=False),
+    sa.Column('total', sa.Float(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'month', 'category_id', 'type')
+    )
+    # Бэкфилл из уже накопленных транзакций
+    op.execute("""
+        INSERT INTO monthly_category_totals (user_id, month, category_id, type, total, count)
+        SELECT t.user_id,
+               date_trunc('month', timezone('UTC', t.date))::date,
+               t.category_id,
+               c.type,
+               sum(t.amount),
+               count(*)
+        FROM transactions t
+        JOIN categories c ON t.category_id = c.id
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('monthly_category_totals')
@@ -0,0 +1,30 @@
+"""add_id_to_user_date_index
+
+Revision ID: d93a0f6c7b18
+Revises: c41d7a9e5f02
+Create Date: 2026-10-17 13:02:41.771530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd93a0f6c7b18'
+down_revision: Union[str, Sequence[str], None] = 'c41d7a9e5f02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_transactions_user_id_date', table_name='transactions')
+    op.create_index('ix_transactions_user_id_date', 'transactions', ['user_id', sa.text('date DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_user_id_date', table_name='transactions')
+    op.create_index('ix_transactions_user_id_date', 'transactions', ['user_id', sa.text('date DESC')], unique=False)
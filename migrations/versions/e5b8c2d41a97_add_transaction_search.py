@@ -0,0 +1,47 @@
+"""add_transaction_search
+
+Revision ID: e5b8c2d41a97
+Revises: d93a0f6c7b18
+Create Date: 2026-10-17 14:21:09.402317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b8c2d41a97'
+down_revision: Union[str, Sequence[str], None] = 'd93a0f6c7b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Генерируемая колонка пересчитывает всю таблицу — на больших базах запускать в окно обслуживания
+    op.add_column('transactions', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('russian'::regconfig, coalesce(description, ''))", persisted=True),
+        nullable=True
+    ))
+    op.create_index('ix_transactions_search_vector', 'transactions', ['search_vector'], unique=False, postgresql_using='gin')
+
+    # Триграммы для поиска подстрок — если pg_trgm есть на сервере
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).scalar():
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_transactions_description_trgm "
+            "ON transactions USING gin (description gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_transactions_description_trgm")
+    op.drop_index('ix_transactions_search_vector', table_name='transactions', postgresql_using='gin')
+    op.drop_column('transactions', 'search_vector')
@@ -0,0 +1,43 @@
+"""add_transaction_type
+
+Revision ID: f1c6a3b95e20
+Revises: e5b8c2d41a97
+Create Date: 2026-10-17 15:08:52.116034
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a3b95e20'
+down_revision: Union[str, Sequence[str], None] = 'e5b8c2d41a97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('transactions', sa.Column(
+        'type',
+        postgresql.ENUM('INCOME', 'EXPENSE', name='transactiontype', create_type=False),
+        nullable=True
+    ))
+    # Бэкфилл из категорий, затем NOT NULL
+    op.execute("""
+        UPDATE transactions t
+        SET type = c.type
+        FROM categories c
+        WHERE c.id = t.category_id
+    """)
+    op.alter_column('transactions', 'type', nullable=False)
+    op.create_index('ix_transactions_user_id_type_date', 'transactions', ['user_id', 'type', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_user_id_type_date', table_name='transactions')
+    op.drop_column('transactions', 'type')
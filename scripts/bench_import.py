@@ -0,0 +1,106 @@
+"""
+Бенчмарк вставки импортируемых транзакций.
+
+legacy — прежний импорт: запрос категории и ORM-объект на каждую строку, один коммит;
+orm — ORM-объекты пачками; executemany и copy — текущий путь импорта.
+
+Запуск: python -m scripts.bench_import [кол-во строк] [размер пачки]
+"""
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from app.core.database import SessionLocal
+from app.models import User, Category, Transaction
+from app.models.enums import TransactionType
+from app.repositories.bulk import copy_rows, insert_rows, supports_copy
+
+COLUMNS = ["amount", "description", "date", "type", "user_id", "category_id"]
+
+
+def make_rows(count: int, user_id: int, category_id: int) -> list:
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "amount": round(10 + i % 5000 * 0.37, 2),
+            "description": f"Bench transaction {i}",
+            "date": start + timedelta(minutes=i),
+            "type": TransactionType.EXPENSE,
+            "user_id": user_id,
+            "category_id": category_id,
+        }
+        for i in range(count)
+    ]
+
+
+def run(name: str, insert_batch, rows: list, batch_size: int) -> float:
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        for i in range(0, len(rows), batch_size):
+            insert_batch(db, rows[i:i + batch_size])
+            db.commit()
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    rate = len(rows) / elapsed
+    print(f"{name:<12} {elapsed:8.2f} s  {rate:12,.0f} rows/s")
+    return rate
+
+
+def legacy_batch(db, rows):
+    for row in rows:
+        db.query(Category).filter(
+            Category.id == row["category_id"],
+            Category.user_id == row["user_id"]
+        ).first()
+        db.add(Transaction(**row))
+
+
+def orm_batch(db, rows):
+    db.add_all([Transaction(**row) for row in rows])
+
+
+def core_batch(db, rows):
+    insert_rows(db, Transaction.__table__, rows)
+
+
+def copy_batch(db, rows):
+    copy_rows(db, Transaction.__table__, COLUMNS, rows)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    db = SessionLocal()
+    user = User(username="bench_import", email="bench_import@example.com", hashed_password="-")
+    db.add(user)
+    db.flush()
+    category = Category(name="Bench", type="expense", user_id=user.id)
+    db.add(category)
+    db.commit()
+    user_id, category_id = user.id, category.id
+
+    try:
+        rows = make_rows(count, user_id, category_id)
+        print(f"Вставка {count} строк пачками по {batch_size}")
+        baseline = run("legacy", legacy_batch, rows, len(rows))
+        results = {
+            "orm": run("orm", orm_batch, rows, batch_size),
+            "executemany": run("executemany", core_batch, rows, batch_size),
+        }
+        if supports_copy(db):
+            results["copy"] = run("copy", copy_batch, rows, batch_size)
+        for name, rate in results.items():
+            print(f"{name}: x{rate / baseline:.1f} к прежнему импорту")
+    finally:
+        db.query(Transaction).filter(Transaction.user_id == user_id).delete()
+        db.query(Category).filter(Category.user_id == user_id).delete()
+        db.query(User).filter(User.id == user_id).delete()
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
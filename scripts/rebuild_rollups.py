@@ -0,0 +1,40 @@
+"""
+Пересборка и сверка месячной свёртки monthly_category_totals.
+
+Запуск: python -m scripts.rebuild_rollups [--user ID] [--check]
+  без --check — пересобирает свёртку из транзакций (бэкфилл/починка);
+  с --check — только сравнивает свёртку с сырыми данными, код выхода 1 при расхождениях.
+"""
+import argparse
+import sys
+
+from app.core.database import SessionLocal
+from app.repositories.rollup_repository import RollupRepository
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Rebuild or check monthly_category_totals")
+    parser.add_argument("--user", type=int, default=None, help="только этот пользователь")
+    parser.add_argument("--check", action="store_true", help="сверить без пересборки")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rollups = RollupRepository(db)
+        if args.check:
+            mismatches = rollups.find_mismatches(args.user)
+            for row in mismatches:
+                print(row)
+            print(f"Расхождений: {len(mismatches)}")
+            return 1 if mismatches else 0
+
+        rows = rollups.rebuild(args.user)
+        db.commit()
+        print(f"✅ Свёртка пересобрана: {rows} строк")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
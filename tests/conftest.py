@@ -0,0 +1,52 @@
+import os
+
+# Тесты идут в режиме разработки: ленивая загрузка связей падает сразу (см. DB_RAISELOAD)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+import pytest
+from sqlalchemy import event
+from app.core.database import Base, async_engine, engine
+import app.models  # noqa: F401 — все таблицы в метаданных
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_schema():
+    """Приложение само таблицы не создаёт (DB_CREATE_ALL выключен) — создаём один раз на прогон"""
+    Base.metadata.create_all(bind=engine)
+
+
+class QueryCounter:
+    """SQL-запросы, выполненные обоими движками (sync и async) за время теста"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def matching(self, text: str) -> list:
+        return [s for s in self.statements if text in s]
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+@pytest.fixture
+def query_counter():
+    """
+    Считает запросы к БД. Вызовите reset() перед проверяемым запросом к API,
+    чтобы не учитывать подготовку данных.
+    """
+    counter = QueryCounter()
+    engines = [engine, async_engine.sync_engine]
+    for target in engines:
+        event.listen(target, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", counter)
@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.core.analytics_cache import SharedCacheBackend
 from app.core.database import SessionLocal
 from app.models.user import User
 from app.models.category import Category
@@ -314,4 +315,466 @@ def test_analytics_different_users(auth_headers, test_categories):
 
     assert response.status_code == 200
     data = response.json()
-    assert data["total_expense"] == 500  # Видит только свою транзакцию
\ No newline at end of file
+    assert data["total_expense"] == 500  # Видит только свою транзакцию
+
+def test_monthly_stats_single_query(auth_headers, test_transactions, monkeypatch):
+    """Тест что месячная статистика считается одним запросом"""
+    from sqlalchemy import event
+    from app.core.config import settings
+    from app.core.database import engine
+
+    # Запрос по сырым транзакциям (GROUPING SETS), а не по свёртке
+    monkeypatch.setattr(settings, "ANALYTICS_USE_ROLLUP", False)
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    now = datetime.now()
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        response = client.get(f"/api/v1/analytics/monthly/{now.year}/{now.month}", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert response.status_code == 200
+    assert response.json()["by_category"] == {"Еда": 5000, "Транспорт": 3000, "Развлечения": 2000}
+    assert len([s for s in statements if "FROM transactions" in s]) == 1
+
+
+def test_monthly_stats_from_rollup(auth_headers, test_transactions, monkeypatch):
+    """Тест что месячная статистика читается одним запросом из свёртки, без сканирования транзакций"""
+    from sqlalchemy import event
+    from app.core.config import settings
+    from app.core.database import engine
+
+    monkeypatch.setattr(settings, "ANALYTICS_USE_ROLLUP", True)
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    now = datetime.now()
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        response = client.get(f"/api/v1/analytics/monthly/{now.year}/{now.month}", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert response.status_code == 200
+    assert response.json()["by_category"] == {"Еда": 5000, "Транспорт": 3000, "Развлечения": 2000}
+    assert len([s for s in statements if "FROM monthly_category_totals" in s]) == 1
+    assert not [s for s in statements if "FROM transactions" in s]
+
+
+# ========== МЕСЯЧНАЯ СВЁРТКА ==========
+
+def _rollup_mismatches():
+    from app.repositories.rollup_repository import RollupRepository
+
+    db = SessionLocal()
+    try:
+        return RollupRepository(db).find_mismatches()
+    finally:
+        db.close()
+
+
+def test_rollup_follows_transaction_changes(auth_headers, test_categories, test_transactions):
+    """Тест что свёртка остаётся согласованной после создания, изменения и удаления транзакций"""
+    assert _rollup_mismatches() == []
+
+    food_id = test_transactions[1]["id"]
+    # Смена суммы, категории и месяца
+    response = client.put(
+        f"/api/v1/transactions/{food_id}",
+        json={
+            "amount": 7000,
+            "category_id": test_categories["Транспорт"]["id"],
+            "date": datetime(2026, 1, 20).isoformat()
+        },
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert _rollup_mismatches() == []
+
+    response = client.get("/api/v1/analytics/monthly/2026/1", headers=auth_headers)
+    assert response.json()["by_category"] == {"Транспорт": 7000}
+
+    client.delete(f"/api/v1/transactions/{food_id}", headers=auth_headers)
+    assert _rollup_mismatches() == []
+
+    response = client.get("/api/v1/analytics/monthly/2026/1", headers=auth_headers)
+    assert response.json()["expense"] == 0
+
+    by_category = {item["category"]: item["total"]
+                   for item in client.get("/api/v1/analytics/by-category", headers=auth_headers).json()}
+    assert by_category == {"Транспорт": 3000, "Развлечения": 2000}
+
+
+def test_rollup_concurrent_deletes(auth_headers, test_categories, test_transactions):
+    """Тест что параллельные удаления одной транзакции (повтор клиента) вычитают её из свёртки один раз"""
+    import threading
+    from fastapi import HTTPException
+    from app.repositories.rollup_repository import RollupRepository
+    from app.repositories.transaction_repository import TransactionRepository
+    from app.schemas.transaction import TransactionBatch
+    from app.services.transaction_service import TransactionService
+
+    def run_concurrently(operation):
+        barrier = threading.Barrier(2)
+        outcomes = []
+
+        def worker():
+            db = SessionLocal()
+            try:
+                service = TransactionService(TransactionRepository(db), RollupRepository(db))
+                barrier.wait()
+                operation(service)
+                outcomes.append(200)
+            except HTTPException as e:
+                outcomes.append(e.status_code)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return sorted(outcomes)
+
+    user_id = test_categories["Еда"]["user_id"]
+    first, second = test_transactions[1]["id"], test_transactions[2]["id"]
+
+    assert run_concurrently(lambda service: service.delete_transaction(first, user_id)) == [200, 404]
+    assert _rollup_mismatches() == []
+
+    batch = TransactionBatch(delete=[second])
+    # Опоздавший пакет либо не находит строку при проверке (200 с ошибкой элемента), либо ловит конфликт
+    assert set(run_concurrently(lambda service: service.apply_batch(user_id, batch))) <= {200, 409}
+    assert _rollup_mismatches() == []
+
+
+def test_rollup_follows_csv_import(auth_headers, test_categories):
+    """Тест что импорт CSV пополняет свёртку"""
+    content = (
+        "amount,description,date,category\n"
+        "100,Обед,2026-03-05,Еда\n"
+        "250,Ужин,2026-03-20,Еда\n"
+        "40000,Аванс,2026-03-25,Зарплата\n"
+    )
+    response = client.post(
+        "/api/v1/import-export/import/csv",
+        files={"file": ("import.csv", content.encode("utf-8"), "text/csv")},
+        headers=auth_headers
+    )
+    assert response.json()["imported"] == 3
+    assert _rollup_mismatches() == []
+
+    data = client.get("/api/v1/analytics/monthly/2026/3", headers=auth_headers).json()
+    assert data["income"] == 40000
+    assert data["by_category"] == {"Еда": 350}
+
+
+def test_rollup_rebuild(auth_headers, test_transactions):
+    """Тест что пересборка восстанавливает испорченную свёртку"""
+    from app.models.monthly_category_total import MonthlyCategoryTotal
+    from app.repositories.rollup_repository import RollupRepository
+
+    db = SessionLocal()
+    try:
+        db.query(MonthlyCategoryTotal).filter(MonthlyCategoryTotal.total == 5000).delete()
+        db.query(MonthlyCategoryTotal).filter(MonthlyCategoryTotal.total == 3000).update({"total": 1})
+        db.commit()
+
+        rollups = RollupRepository(db)
+        assert len(rollups.find_mismatches()) == 2
+
+        assert rollups.rebuild() == 4
+        db.commit()
+        assert rollups.find_mismatches() == []
+    finally:
+        db.close()
+
+
+# ========== КЭШ АНАЛИТИКИ ==========
+
+class FakeSharedBackend(SharedCacheBackend):
+    """Общий бэкенд кэша в памяти вместо Redis"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ttl):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+
+def test_analytics_cache_invalidated_by_writes(auth_headers, test_categories, test_transactions):
+    """Тест что повторный запрос берётся из кэша, а запись сразу сбрасывает его"""
+    from sqlalchemy import event
+    from app.core.database import engine
+
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    assert client.get("/api/v1/analytics/balance", headers=auth_headers).json()["balance"] == 90000
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        assert client.get("/api/v1/analytics/balance", headers=auth_headers).json()["balance"] == 90000
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    assert not [s for s in statements if "FROM transactions" in s]
+
+    client.post(
+        "/api/v1/transactions/",
+        json={"amount": 500, "description": "Кофе", "category_id": test_categories["Еда"]["id"]},
+        headers=auth_headers
+    )
+    assert client.get("/api/v1/analytics/balance", headers=auth_headers).json()["balance"] == 89500
+
+    client.delete(f"/api/v1/transactions/{test_transactions[0]['id']}", headers=auth_headers)
+    assert client.get("/api/v1/analytics/balance", headers=auth_headers).json()["balance"] == -10500
+
+
+def test_analytics_cache_shared_backend():
+    """Тест что через общий бэкенд инвалидация в одном воркере видна в другом"""
+    from app.core.analytics_cache import AnalyticsCache
+
+    shared = FakeSharedBackend()
+    worker1 = AnalyticsCache(maxsize=10, ttl=60, shared=shared)
+    worker2 = AnalyticsCache(maxsize=10, ttl=60, shared=shared)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"balance": len(calls)}
+
+    assert worker1.get_or_compute(1, "balance", {}, compute) == {"balance": 1}
+    # Второй воркер получает значение из общего бэкенда, без пересчёта
+    assert worker2.get_or_compute(1, "balance", {}, compute) == {"balance": 1}
+    assert len(calls) == 1
+
+    worker2.invalidate_user(1)
+    assert worker1.get_or_compute(1, "balance", {}, compute) == {"balance": 2}
+    # Другие пользователи и параметры не затронуты
+    assert worker1.get_or_compute(2, "balance", {}, compute) == {"balance": 3}
+    assert worker1.get_or_compute(1, "balance", {"x": 1}, compute) == {"balance": 4}
+
+
+# ========== ВРЕМЕННЫЕ РЯДЫ ==========
+
+@pytest.fixture
+def spread_transactions(auth_headers, test_categories):
+    """Транзакции в январе, марте и апреле 2026 (февраль пустой)"""
+    for amount, name, when in [
+        (50000, "income", datetime(2026, 1, 10)),
+        (1000, "Еда", datetime(2026, 1, 12)),
+        (300, "Транспорт", datetime(2026, 3, 2)),
+        (700, "Еда", datetime(2026, 3, 3)),
+        (200, "Еда", datetime(2026, 4, 30)),
+    ]:
+        client.post(
+            "/api/v1/transactions/",
+            json={
+                "amount": amount,
+                "description": name,
+                "category_id": test_categories[name]["id"],
+                "date": when.isoformat()
+            },
+            headers=auth_headers
+        )
+
+
+def test_timeseries_monthly_fills_empty_buckets(auth_headers, spread_transactions):
+    """Тест помесячного ряда: один запрос, пустые месяцы заполнены нулями"""
+    response = client.get(
+        "/api/v1/analytics/timeseries",
+        params={"start_date": "2026-01-15", "end_date": "2026-05-01", "bucket": "month", "by_category": True},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    points = response.json()["points"]
+    assert [p["period"] for p in points] == ["2026-01-01", "2026-02-01", "2026-03-01", "2026-04-01", "2026-05-01"]
+    assert points[0]["income"] == 50000
+    assert points[0]["balance"] == 49000
+    assert points[1] == {"period": "2026-02-01", "income": 0, "expense": 0, "balance": 0, "by_category": {}}
+    assert points[2]["by_category"] == {"Еда": 700, "Транспорт": 300}
+    assert points[3]["expense"] == 200
+
+
+def test_analytics_calendar_edges(auth_headers, monkeypatch):
+    """Тест что периоды у границ календаря дают 400/422, а не 500"""
+    from app.core.config import settings
+
+    for use_rollup in (True, False):
+        monkeypatch.setattr(settings, "ANALYTICS_USE_ROLLUP", use_rollup)
+        assert client.get("/api/v1/analytics/monthly/9999/12", headers=auth_headers).status_code == 400
+        assert client.get("/api/v1/analytics/monthly/9999/11", headers=auth_headers).status_code == 200
+        assert client.get("/api/v1/analytics/monthly/2026/13", headers=auth_headers).status_code == 422
+
+        for bucket in ("day", "week", "month", "quarter", "year"):
+            response = client.get(
+                "/api/v1/analytics/timeseries",
+                params={"start_date": "9999-12-31", "end_date": "9999-12-31", "bucket": bucket},
+                headers=auth_headers
+            )
+            assert response.status_code == 400, bucket
+
+
+def test_timeseries_rollup_matches_raw(auth_headers, spread_transactions, monkeypatch):
+    """Тест что ряд из свёртки совпадает с рядом по сырым транзакциям"""
+    from app.core.analytics_cache import analytics_cache
+    from app.core.config import settings
+
+    monkeypatch.setattr(analytics_cache, "enabled", False)
+
+    def fetch(bucket):
+        return client.get(
+            "/api/v1/analytics/timeseries",
+            params={"start_date": "2025-12-01", "end_date": "2026-12-31", "bucket": bucket, "by_category": True},
+            headers=auth_headers
+        ).json()
+
+    for bucket in ["month", "quarter", "year"]:
+        monkeypatch.setattr(settings, "ANALYTICS_USE_ROLLUP", True)
+        from_rollup = fetch(bucket)
+        monkeypatch.setattr(settings, "ANALYTICS_USE_ROLLUP", False)
+        assert fetch(bucket) == from_rollup
+
+    quarters = fetch("quarter")["points"]
+    assert [p["period"] for p in quarters] == ["2025-10-01", "2026-01-01", "2026-04-01", "2026-07-01", "2026-10-01"]
+    assert quarters[1]["expense"] == 2000
+
+
+def test_timeseries_weekly(auth_headers, spread_transactions):
+    """Тест недельного ряда: недели начинаются с понедельника"""
+    response = client.get(
+        "/api/v1/analytics/timeseries",
+        params={"start_date": "2026-03-01", "end_date": "2026-03-10", "bucket": "week"},
+        headers=auth_headers
+    )
+
+    points = response.json()["points"]
+    assert [p["period"] for p in points] == ["2026-02-23", "2026-03-02", "2026-03-09"]
+    assert [p["expense"] for p in points] == [0, 1000, 0]
+    assert "by_category" not in points[0]
+
+
+def test_timeseries_validation(auth_headers):
+    """Тест проверки параметров ряда"""
+    response = client.get(
+        "/api/v1/analytics/timeseries",
+        params={"start_date": "2026-03-01", "end_date": "2026-01-01"},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    response = client.get(
+        "/api/v1/analytics/timeseries",
+        params={"start_date": "2000-01-01", "end_date": "2026-01-01", "bucket": "day"},
+        headers=auth_headers
+    )
+    assert response.status_code == 400
+
+    response = client.get(
+        "/api/v1/analytics/timeseries",
+        params={"start_date": "2026-01-01", "end_date": "2026-02-01", "bucket": "hour"},
+        headers=auth_headers
+    )
+    assert response.status_code == 422
+
+
+# ========== ТИП ТРАНЗАКЦИИ ==========
+
+def test_balance_without_category_join(auth_headers, test_transactions):
+    """Тест что баланс считается по одной таблице transactions"""
+    from sqlalchemy import event
+    from app.core.database import engine
+    from app.core.analytics_cache import analytics_cache
+
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    analytics_cache.clear()
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        response = client.get("/api/v1/analytics/balance", headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert response.json()["balance"] == 90000
+    queries = [s for s in statements if "FROM transactions" in s]
+    assert len(queries) == 1
+    assert "categories" not in queries[0]
+
+
+def test_category_type_change_syncs_transactions(auth_headers, test_categories, test_transactions):
+    """Тест что смена типа категории переносится на транзакции и свёртку"""
+    response = client.put(
+        f"/api/v1/categories/{test_categories['Транспорт']['id']}",
+        json={"type": "income"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["type"] == "income"
+
+    data = client.get("/api/v1/analytics/balance", headers=auth_headers).json()
+    assert data["total_income"] == 103000
+    assert data["total_expense"] == 7000
+    assert _rollup_mismatches() == []
+
+    now = datetime.now()
+    monthly = client.get(f"/api/v1/analytics/monthly/{now.year}/{now.month}", headers=auth_headers).json()
+    assert monthly["income"] == 103000
+    assert "Транспорт" not in monthly["by_category"]
+
+    income_only = client.get("/api/v1/transactions/", params={"type": "income"}, headers=auth_headers).json()
+    assert sorted(t["amount"] for t in income_only) == [3000, 100000]
+
+
+def test_transaction_category_change_updates_type(auth_headers, test_categories, test_transactions):
+    """Тест что перенос транзакции в категорию другого типа меняет её тип"""
+    client.put(
+        f"/api/v1/transactions/{test_transactions[1]['id']}",
+        json={"category_id": test_categories["income"]["id"]},
+        headers=auth_headers
+    )
+    data = client.get("/api/v1/analytics/balance", headers=auth_headers).json()
+    assert data["total_income"] == 105000
+    assert data["total_expense"] == 5000
+    assert _rollup_mismatches() == []
+
+
+# ========== ТОЧНЫЕ СУММЫ ==========
+
+def test_amounts_are_exact(auth_headers, test_categories):
+    """Тест что суммы хранятся и складываются до копейки, без ошибок float"""
+    for amount, name in [(0.1, "income"), (0.2, "income"), (0.1, "Еда"), (10.005, "Транспорт")]:
+        client.post(
+            "/api/v1/transactions/",
+            json={"amount": amount, "description": "x", "category_id": test_categories[name]["id"]},
+            headers=auth_headers
+        )
+
+    balance = client.get("/api/v1/analytics/balance", headers=auth_headers).json()
+    assert balance == {"total_income": 0.3, "total_expense": 10.11, "balance": -9.81}
+
+    now = datetime.now()
+    monthly = client.get(f"/api/v1/analytics/monthly/{now.year}/{now.month}", headers=auth_headers).json()
+    assert monthly["income"] == 0.3
+    assert monthly["balance"] == -9.81
+    assert monthly["by_category"] == {"Еда": 0.1, "Транспорт": 10.01}
+    assert _rollup_mismatches() == []
@@ -102,4 +102,115 @@ def test_login_wrong_password():
         }
     )
 
-    assert response.status_code == 401  # Неавторизован
\ No newline at end of file
+    assert response.status_code == 401  # Неавторизован
+
+def _login(username: str) -> dict:
+    client.post("/api/v1/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": "12345678"
+    })
+    response = client.post("/api/v1/auth/login", data={"username": username, "password": "12345678"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_stateless_auth_makes_no_user_query():
+    """Тест что авторизованный запрос не ходит в БД за пользователем"""
+    from sqlalchemy import event
+    from app.core.database import engine
+
+    headers = _login("stateless")
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        response = client.get("/api/v1/categories/", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert response.status_code == 200
+    assert not any("FROM users" in s for s in statements)
+
+
+def test_revoke_tokens():
+    """Тест отзыва токенов: старый токен перестаёт работать"""
+    headers = _login("revoker")
+
+    response = client.post("/api/v1/auth/revoke", headers=headers)
+    assert response.status_code == 200
+
+    response = client.get("/api/v1/categories/", headers=headers)
+    assert response.status_code == 401
+
+    new_headers = _login("revoker")
+    response = client.get("/api/v1/categories/", headers=new_headers)
+    assert response.status_code == 200
+
+
+def test_login_rehashes_password_when_cost_changes(monkeypatch):
+    """Тест перехеширования пароля при смене стоимости bcrypt"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+    _login("rehash")
+
+    db = SessionLocal()
+    try:
+        assert db.query(User).filter(User.username == "rehash").one().hashed_password.startswith("$2b$04$")
+    finally:
+        db.close()
+
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 5)
+    response = client.post("/api/v1/auth/login", data={"username": "rehash", "password": "12345678"})
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        assert db.query(User).filter(User.username == "rehash").one().hashed_password.startswith("$2b$05$")
+    finally:
+        db.close()
+
+
+def test_login_sheds_load_when_hasher_is_busy(monkeypatch):
+    """Тест что при переполненной очереди хеширования сразу отдаётся 503"""
+    import threading
+    from app.core.security import password_hasher
+
+    client.post("/api/v1/auth/register", json={
+        "username": "busy",
+        "email": "busy@example.com",
+        "password": "12345678"
+    })
+    monkeypatch.setattr(password_hasher, "_slots", threading.BoundedSemaphore(1))
+    password_hasher._slots.acquire()
+
+    response = client.post("/api/v1/auth/login", data={"username": "busy", "password": "12345678"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_hasher_keeps_slot_until_timed_out_operation_finishes():
+    """Тест что операция, не уложившаяся в таймаут, держит слот, пока реально выполняется"""
+    import time
+    from app.core.security import PasswordHasher, PasswordHasherBusy
+
+    hasher = PasswordHasher(workers=1, max_pending=1, timeout=0.05)
+    try:
+        # Прогрев: процесс пула уже запущен, следующая операция сразу начнёт выполняться
+        hasher.timeout = 30
+        hasher.run(time.sleep, 0)
+        hasher.timeout = 0.05
+
+        with pytest.raises(PasswordHasherBusy, match="timed out"):
+            hasher.run(time.sleep, 0.5)
+        with pytest.raises(PasswordHasherBusy, match="Too many"):
+            hasher.run(time.sleep, 0)
+
+        time.sleep(1)
+        hasher.run(time.sleep, 0)
+    finally:
+        hasher.shutdown()
@@ -1,3 +1,4 @@
+import anyio
 import pytest
 import csv
 import io
@@ -253,4 +254,122 @@ def test_import_csv_large_file(auth_headers, test_category):
     assert data["imported"] == 10
 
     get_resp = client.get("/api/v1/transactions/", headers=auth_headers)
-    assert len(get_resp.json()) == 10
\ No newline at end of file
+    assert len(get_resp.json()) == 10
+
+def test_import_csv_in_batches(auth_headers, test_category, monkeypatch):
+    """Тест потокового импорта несколькими пачками"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "CSV_IMPORT_BATCH_SIZE", 3)
+
+    csv_content = io.StringIO()
+    writer = csv.writer(csv_content)
+    writer.writerow(['amount', 'description', 'date'])
+
+    for i in range(10):
+        writer.writerow([f"{i + 1}.00", f"Транзакция {i}", "2026-02-26"])
+    writer.writerow(['0', 'Ноль', '2026-02-26'])
+
+    response = client.post(
+        "/api/v1/import-export/import/csv",
+        files={"file": ("test.csv", csv_content.getvalue().encode('utf-8-sig'), "text/csv")},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["imported"] == 10
+    assert data["errors"] == ["Row 12: amount must be positive"]
+
+
+def test_import_csv_category_by_id_and_name(auth_headers, test_category):
+    """Тест импорта с категорией по id и по имени"""
+    other = client.post(
+        "/api/v1/categories/",
+        json={"name": "Транспорт", "type": "expense"},
+        headers=auth_headers
+    ).json()
+
+    csv_content = io.StringIO()
+    writer = csv.writer(csv_content)
+    writer.writerow(['amount', 'description', 'date', 'category_id', 'category'])
+    writer.writerow(['100', 'По id', '2026-02-26', other["id"], ''])
+    writer.writerow(['200', 'По имени', '2026-02-26', '', 'транспорт'])
+    writer.writerow(['300', 'Чужая', '2026-02-26', '99999', ''])
+
+    response = client.post(
+        "/api/v1/import-export/import/csv",
+        files={"file": ("test.csv", csv_content.getvalue(), "text/csv")},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 3
+
+    get_resp = client.get("/api/v1/transactions/", headers=auth_headers)
+    by_description = {t["description"]: t["category_id"] for t in get_resp.json()}
+    assert by_description["По id"] == other["id"]
+    assert by_description["По имени"] == other["id"]
+    # Чужой id — в категорию по умолчанию: первую созданную, если помеченной нет
+    assert by_description["Чужая"] == test_category["id"]
+
+
+@pytest.mark.parametrize("use_copy", [True, False])
+def test_import_csv_bulk_paths(auth_headers, test_category, monkeypatch, use_copy):
+    """Тест импорта через COPY и через executemany"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "IMPORT_USE_COPY", use_copy)
+
+    csv_content = io.StringIO()
+    writer = csv.writer(csv_content)
+    writer.writerow(['amount', 'description', 'date'])
+    writer.writerow(['100.50', 'Продукты, "Пятёрочка"', '2026-02-26T10:00:00+03:00'])
+    writer.writerow(['250.00', '', '2026-02-25'])
+
+    response = client.post(
+        "/api/v1/import-export/import/csv",
+        files={"file": ("test.csv", csv_content.getvalue(), "text/csv")},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == 2
+
+    transactions = client.get("/api/v1/transactions/", headers=auth_headers).json()
+    descriptions = {t["description"] for t in transactions}
+    assert descriptions == {'Продукты, "Пятёрочка"', "Imported transaction"}
+
+
+def test_export_csv_streams_in_chunks(auth_headers, test_transactions, monkeypatch):
+    """Тест потокового экспорта маленькими порциями с сервера"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "CSV_EXPORT_BATCH_SIZE", 1)
+
+    # TestClient склеивает тело ответа — куски видны только на уровне ASGI-сообщений
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    # spec_version 2.4 (как у uvicorn): ответ не ждёт http.disconnect от клиента
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/v1/import-export/export/csv", "raw_path": b"/api/v1/import-export/export/csv",
+        "root_path": "", "query_string": b"", "server": ("testserver", 80), "client": ("testclient", 50000),
+        "headers": [(b"host", b"testserver")] + [(k.lower().encode(), v.encode()) for k, v in auth_headers.items()],
+    }
+    anyio.run(app, scope, receive, send)
+
+    assert messages[0]["status"] == 200
+    chunks = [m["body"].decode() for m in messages if m["type"] == "http.response.body" and m.get("body")]
+    # Заголовок уходит отдельным первым куском, данные — по CSV_EXPORT_BATCH_SIZE строк
+    assert chunks[0] == "id,amount,description,date,category_id,user_id\r\n"
+    assert len(chunks) == 4
+    content = "".join(chunks)
+
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert len(rows) == 3
+    # Новые транзакции идут первыми
+    assert [r["description"] for r in rows] == ["Транзакция 2", "Транзакция 1", "Транзакция 0"]
@@ -0,0 +1,129 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.models.category import Category
+from app.models.transaction import Transaction
+from app.models.goal import Goal
+
+client = TestClient(app)
+
+
+def _clean():
+    db = SessionLocal()
+    try:
+        db.query(Goal).delete()
+        db.query(Transaction).delete()
+        db.query(Category).delete()
+        db.query(User).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+@pytest.fixture(scope="module", autouse=True)
+def async_client():
+    """Один event loop на модуль: соединения asyncpg привязаны к своему loop"""
+    with client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    """Очищаем таблицы до и после каждого теста (цели ссылаются на пользователей)"""
+    _clean()
+    yield
+    _clean()
+
+
+@pytest.fixture
+def auth_headers():
+    """Создаём пользователя и возвращаем заголовки с токеном"""
+    client.post("/api/v1/auth/register", json={
+        "username": "testuser",
+        "email": "test@example.com",
+        "password": "12345678"
+    })
+
+    login_resp = client.post("/api/v1/auth/login", data={
+        "username": "testuser",
+        "password": "12345678"
+    })
+    token = login_resp.json()["access_token"]
+
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_create_goal(auth_headers):
+    """Тест создания цели"""
+    response = client.post(
+        "/api/v1/goals/",
+        json={"name": "Отпуск", "target_amount": 100000, "deadline": "2026-12-31T00:00:00Z"},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["name"] == "Отпуск"
+    assert data["target_amount"] == 100000
+    assert data["current_amount"] == 0
+    assert "created_at" in data
+
+
+def test_goal_crud(auth_headers):
+    """Тест чтения, обновления и удаления цели"""
+    goal_id = client.post(
+        "/api/v1/goals/",
+        json={"name": "Ноутбук", "target_amount": 80000},
+        headers=auth_headers
+    ).json()["id"]
+
+    response = client.put(
+        f"/api/v1/goals/{goal_id}",
+        json={"current_amount": 20000},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["current_amount"] == 20000
+
+    response = client.get("/api/v1/goals/", headers=auth_headers)
+    assert [g["id"] for g in response.json()] == [goal_id]
+
+    response = client.delete(f"/api/v1/goals/{goal_id}", headers=auth_headers)
+    assert response.status_code == 204
+
+    response = client.get(f"/api/v1/goals/{goal_id}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_goal_amounts_rounded_like_stored(auth_headers):
+    """Тест что суммы цели в ответе совпадают с сохранёнными до копейки"""
+    created = client.post(
+        "/api/v1/goals/",
+        json={"name": "Копилка", "target_amount": 0.1 + 0.2},
+        headers=auth_headers
+    ).json()
+    assert created["target_amount"] == 0.3
+
+    response = client.put(f"/api/v1/goals/{created['id']}", json={"current_amount": 2.675}, headers=auth_headers)
+    assert response.json()["current_amount"] == 2.68
+    assert client.get(f"/api/v1/goals/{created['id']}", headers=auth_headers).json()["current_amount"] == 2.68
+
+
+def test_goal_requires_auth():
+    """Тест доступа без токена"""
+    response = client.get("/api/v1/goals/")
+    assert response.status_code == 401
+
+
+def test_create_goal_single_query(auth_headers, query_counter):
+    """Тест что создание цели — один INSERT ... RETURNING, без SELECT после коммита"""
+    query_counter.reset()
+    response = client.post("/api/v1/goals/", json={"name": "Отпуск", "target_amount": 1000}, headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.json()["created_at"] is not None
+    goal_statements = query_counter.matching("goals")
+    assert len(goal_statements) == 1
+    assert goal_statements[0].startswith("INSERT INTO goals") and "RETURNING" in goal_statements[0]
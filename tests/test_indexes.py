@@ -0,0 +1,105 @@
+import pytest
+from datetime import date
+from sqlalchemy import event, text
+from app.core.database import SessionLocal, engine
+from app.repositories.transaction_repository import TransactionQuery, TransactionRepository
+from app.repositories.category_repository import CategoryRepository
+from app.models.goal import Goal
+
+
+SEED_SQL = [
+    """INSERT INTO users (email, username, hashed_password)
+       SELECT 'idx' || g || '@example.com', 'idx' || g, '-' FROM generate_series(1, 50) g""",
+    """INSERT INTO categories (name, type, user_id, is_default)
+       SELECT 'idx' || g, 'EXPENSE', u.id, false
+       FROM users u, generate_series(1, 4) g WHERE u.username LIKE 'idx%'""",
+    """INSERT INTO transactions (amount, description, date, type, user_id, category_id)
+       SELECT 10, 'idx', now() - g * interval '1 hour', c.type, c.user_id, c.id
+       FROM categories c, generate_series(1, 100) g WHERE c.name LIKE 'idx%'""",
+    """INSERT INTO goals (name, target_amount, user_id)
+       SELECT 'idx' || g, 1000, u.id FROM users u, generate_series(1, 5) g WHERE u.username LIKE 'idx%'""",
+    "ANALYZE users, categories, transactions, goals",
+]
+
+
+@pytest.fixture
+def db():
+    """Сессия с данными на 50 пользователей; всё откатывается после теста"""
+    session = SessionLocal()
+    try:
+        for statement in SEED_SQL:
+            session.execute(text(statement))
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+@pytest.fixture
+def seeded_ids(db):
+    return db.execute(text(
+        "SELECT c.user_id, c.id FROM categories c WHERE c.name LIKE 'idx%' ORDER BY c.id LIMIT 1"
+    )).one()
+
+
+def explain(db, run_query, allow_sort: bool = True) -> str:
+    """Выполняет запрос репозитория, перехватывает его SQL и возвращает план EXPLAIN"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        run_query()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[-1]
+    cursor = db.connection().connection.cursor()
+    # На маленьких тестовых таблицах seq scan дешевле — проверяем, какой индекс выберет планировщик
+    cursor.execute("SET LOCAL enable_seqscan = off")
+    if not allow_sort:
+        # Для полного экспорта bitmap + сортировка бывает дешевле; проверяем, что порядок даёт индекс
+        cursor.execute("SET LOCAL enable_sort = off")
+    cursor.execute("EXPLAIN " + statement, parameters)
+    return "\n".join(row[0] for row in cursor.fetchall())
+
+
+def test_date_range_uses_user_date_index(db, seeded_ids):
+    repository = TransactionRepository(db)
+    plan = explain(db, lambda: repository.get_by_date_range(seeded_ids.user_id, date(2026, 1, 1), date(2026, 2, 1)))
+    assert "ix_transactions_user_id_date" in plan
+
+
+def test_export_order_uses_user_date_index(db, seeded_ids):
+    repository = TransactionRepository(db)
+    plan = explain(db, lambda: list(repository.stream_for_export(seeded_ids.user_id)), allow_sort=False)
+    assert "ix_transactions_user_id_date" in plan
+    assert "Sort" not in plan
+
+
+def test_deep_page_is_index_seek(db, seeded_ids):
+    """Страница по курсору — поиск по индексу от курсора, без OFFSET и сортировки"""
+    repository = TransactionRepository(db)
+    first = repository.find(TransactionQuery(seeded_ids.user_id), limit=50)
+    plan = explain(db, lambda: repository.find(TransactionQuery(seeded_ids.user_id), limit=50, cursor=first.next_cursor))
+    assert "ix_transactions_user_id_date" in plan
+    assert "Sort" not in plan
+
+
+def test_category_filter_uses_user_category_index(db, seeded_ids):
+    repository = TransactionRepository(db)
+    plan = explain(db, lambda: repository.get_by_user_and_category(seeded_ids.user_id, seeded_ids.id))
+    assert "ix_transactions_user_id_category_id_date" in plan
+
+
+def test_categories_by_user_use_index(db, seeded_ids):
+    repository = CategoryRepository(db)
+    plan = explain(db, lambda: repository.get_by_user(seeded_ids.user_id))
+    assert "ix_categories_user_id" in plan
+
+
+def test_goals_by_user_use_index(db, seeded_ids):
+    plan = explain(db, lambda: db.query(Goal).filter(Goal.user_id == seeded_ids.user_id).all())
+    assert "ix_goals_user_id" in plan
@@ -0,0 +1,208 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.pool_metrics import PoolStats
+
+client = TestClient(app)
+
+
+def test_pool_stats_histogram_is_cumulative():
+    """Тест гистограммы ожидания соединения"""
+    stats = PoolStats(buckets=(0.01, 0.1))
+    for seconds in (0.001, 0.05, 0.05, 3):
+        stats.observe_wait(seconds)
+    stats.record_timeout()
+
+    class FakePool:
+        def size(self): return 5
+        def checkedout(self): return 2
+        def checkedin(self): return 3
+        def overflow(self): return -3
+
+    snapshot = stats.snapshot(FakePool())
+    assert snapshot["wait_seconds"]["buckets"] == {"0.01": 1, "0.1": 3, "+Inf": 4}
+    assert snapshot["wait_seconds"]["count"] == 4
+    assert snapshot["timeouts_total"] == 1
+    assert snapshot["overflow"] == 0
+
+
+def test_db_pool_metrics_endpoint():
+    """Тест эндпоинта со статистикой пула"""
+    before = client.get("/metrics/db-pool").json()["sync"]["checkouts_total"]
+
+    # Любой запрос с БД берёт соединение из пула
+    client.post("/api/v1/auth/login", data={"username": "nobody", "password": "12345678"})
+
+    data = client.get("/metrics/db-pool").json()
+    assert data["sync"]["checkouts_total"] > before
+    assert data["sync"]["checked_out"] == 0
+    assert set(data) == {"sync", "async"}
+
+
+def _register_and_login():
+    client.post("/api/v1/auth/register", json={
+        "username": "metrics",
+        "email": "metrics@example.com",
+        "password": "12345678"
+    })
+    token = client.post("/api/v1/auth/login", data={"username": "metrics", "password": "12345678"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_server_timing_header():
+    """Тест заголовка Server-Timing с числом SQL-запросов и временем в БД"""
+    response = client.get("/api/v1/categories/", headers=_register_and_login())
+    assert response.status_code == 200
+
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith("db;dur=")
+    assert 'desc="1 queries"' in timing
+    assert "db-slowest;dur=" in timing
+
+    response = client.get("/health")
+    assert 'desc="0 queries"' in response.headers["Server-Timing"]
+
+
+def test_metrics_endpoint_prometheus_format():
+    """Тест /metrics: гистограммы SQL и времени ответа, счётчики по маршрутам"""
+    headers = _register_and_login()
+    client.get("/api/v1/categories/", headers=headers)
+    client.get("/api/v1/categories/", headers=headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    samples = {}
+    for line in response.text.splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+
+    assert samples['db_statement_duration_seconds_bucket{le="+Inf"}'] == samples["db_statement_duration_seconds_count"]
+    route = 'method="GET",route="/api/v1/categories/"'
+    assert samples[f'http_requests_total{{{route},status="200"}}'] >= 2
+    assert samples[f'http_request_duration_seconds_bucket{{{route},le="+Inf"}}'] >= 2
+    assert samples[f"http_response_size_bytes_sum{{{route}}}"] > 0
+    # Сам запрос к /metrics ещё выполняется
+    assert samples["http_requests_in_flight"] == 1
+    assert samples[f"http_request_db_statements_total{{{route}}}"] >= 2
+    assert samples[f"http_request_db_seconds_total{{{route}}}"] > 0
+
+
+def test_slow_query_log(caplog):
+    """Тест что запросы дольше порога попадают в лог"""
+    from sqlalchemy import create_engine, text
+    from app.core.config import settings
+    from app.core.sql_metrics import instrument_engine
+
+    engine = create_engine(settings.DATABASE_URL)
+    instrument_engine(engine, slow_query_ms=50)
+    try:
+        with engine.connect() as conn, caplog.at_level("WARNING", logger="app.core.sql_metrics"):
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT pg_sleep(0.1)"))
+    finally:
+        engine.dispose()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert len(messages) == 1
+    assert "pg_sleep" in messages[0]
+
+
+def test_route_template():
+    """Тест метки маршрута: шаблон сработавшего маршрута с префиксом роутера, даже при совпадающих значениях"""
+    from fastapi import APIRouter, FastAPI
+    from app.core.http_metrics import route_template
+
+    labels = []
+    router = APIRouter()
+
+    @router.get("/monthly/{year}/{month}")
+    def monthly(year: int, month: int):
+        return {}
+
+    @router.get("/items/{name}")
+    def item(name: str):
+        return {}
+
+    demo = FastAPI()
+    demo.include_router(router, prefix="/api/v1/analytics")
+
+    class RecordRoute:
+        def __init__(self, app):
+            self.app = app
+
+        async def __call__(self, scope, receive, send):
+            await self.app(scope, receive, send)
+            labels.append(route_template(scope))
+
+    demo.add_middleware(RecordRoute)
+    demo_client = TestClient(demo)
+    demo_client.get("/api/v1/analytics/monthly/3/3")
+    # Значение совпадает со статическим сегментом пути
+    demo_client.get("/api/v1/analytics/items/items")
+    demo_client.get("/nope")
+
+    assert labels == ["/api/v1/analytics/monthly/{year}/{month}", "/api/v1/analytics/items/{name}", "unmatched"]
+
+
+def test_metrics_aggregated_across_workers(tmp_path):
+    """Тест сбора метрик нескольких воркеров через общий каталог"""
+    import os
+    from app.core.metrics import Metrics, MetricsDirectory, MetricsExporter
+
+    def worker_snapshot(requests, in_flight):
+        metrics = Metrics()
+        metrics.inc("http_requests_total", (("route", "/x"),), requests)
+        metrics.add_gauge("http_requests_in_flight", in_flight)
+        metrics.observe("http_request_duration_seconds", (0.1, 1), 0.5, (("route", "/x"),))
+        return metrics.snapshot()
+
+    directory = MetricsDirectory(str(tmp_path))
+    # Живой соседний воркер (родительский процесс) и давно завершившийся
+    directory.write(f"{os.getppid()}-a1", worker_snapshot(requests=3, in_flight=2))
+    directory.write(f"{2 ** 22 + 1}-b2", worker_snapshot(requests=3, in_flight=5))
+    # Прежний процесс с тем же pid: его файл не перезаписан и тоже учитывается
+    directory.write(f"{2 ** 22 + 1}-c3", worker_snapshot(requests=1, in_flight=0))
+    # Посторонние файлы не мешают сбору
+    (tmp_path / "notes.json").write_text("{}")
+    (tmp_path / "README").write_text("")
+
+    local = Metrics()
+    local.inc("http_requests_total", (("route", "/x"),), 1)
+    exporter = MetricsExporter([local], directory=str(tmp_path))
+
+    lines = exporter.render().splitlines()
+    assert 'http_requests_total{route="/x"} 8' in lines
+    # gauge завершившегося воркера не учитывается
+    assert "http_requests_in_flight 2" in lines
+    assert 'http_request_duration_seconds_bucket{route="/x",le="1"} 3' in lines
+    assert "# TYPE http_requests_total counter" in lines
+
+    # Свой снимок воркер тоже пишет в каталог
+    exporter.flush()
+    assert f"{exporter.worker_id()}.json" in os.listdir(tmp_path)
+    assert exporter.worker_id().startswith(f"{os.getpid()}-")
+    assert 'http_requests_total{route="/x"} 8' in exporter.render().splitlines()
+
+
+def test_metrics_middleware_counts_errors():
+    """Тест что исключение в обработчике считается ошибкой со статусом 500"""
+    from fastapi import FastAPI
+    from app.core.http_metrics import MetricsMiddleware, http_metrics
+    from app.core.metrics import MetricsExporter
+
+    broken = FastAPI()
+
+    @broken.get("/boom/{item_id}")
+    def boom(item_id: int):
+        raise RuntimeError("boom")
+
+    broken.add_middleware(MetricsMiddleware, exporter=MetricsExporter([]))
+    route = (("method", "GET"), ("route", "/boom/{item_id}"))
+    before = http_metrics.counters.get(("http_request_errors_total", route), 0)
+
+    response = TestClient(broken, raise_server_exceptions=False).get("/boom/7")
+    assert response.status_code == 500
+    assert http_metrics.counters[("http_request_errors_total", route)] == before + 1
+    assert http_metrics.counters[("http_requests_total", route + (("status", "500"),))] >= 1
@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+
+# Бюджет холодного старта пода: импорт приложения и прогон lifespan, секунды
+# (импорт сейчас ~1.2 с). На медленных CI-машинах бюджет можно поднять через окружение
+IMPORT_BUDGET_SECONDS = float(os.environ.get("STARTUP_IMPORT_BUDGET", 3.0))
+LIFESPAN_BUDGET_SECONDS = float(os.environ.get("STARTUP_LIFESPAN_BUDGET", 0.5))
+
+STARTUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    status = client.get("/health").status_code
+    entered = time.perf_counter()
+print(json.dumps({"import": imported - started, "status": status, "lifespan": entered - imported}))
+"""
+
+
+def _cold_start(**env) -> dict:
+    """Запуск в отдельном процессе: импорт всего приложения с нуля, как у нового воркера"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT],
+        cwd=root,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_startup_without_database():
+    """Тест что приложение импортируется и стартует без доступной БД и укладывается в бюджет"""
+    # Порт 1 закрыт: любая попытка соединения сразу упала бы
+    timings = _cold_start(POSTGRES_HOST="127.0.0.1", POSTGRES_PORT="1", DB_CREATE_ALL="false")
+
+    assert timings["status"] == 200
+    assert timings["import"] < IMPORT_BUDGET_SECONDS
+    # /health и сам lifespan в БД не ходят; время включает первый запрос
+    assert timings["lifespan"] < LIFESPAN_BUDGET_SECONDS
@@ -1,3 +1,5 @@
+import base64
+import json
 import pytest
 import time
 from fastapi.testclient import TestClient
@@ -277,6 +279,24 @@ def test_update_transaction_partial(auth_headers, test_category):
     assert data["description"] == "Тест"
 
 
+def test_transaction_amount_rounded_like_stored(auth_headers, test_category):
+    """Тест что ответ после записи совпадает с суммой, сохранённой в NUMERIC(…, 2)"""
+    create_resp = client.post(
+        "/api/v1/transactions/",
+        json={"amount": 10.005, "description": "Копейки", "category_id": test_category["id"]},
+        headers=auth_headers
+    )
+    assert create_resp.status_code == 200
+    transaction_id = create_resp.json()["id"]
+    assert create_resp.json()["amount"] == 10.01
+
+    response = client.put(f"/api/v1/transactions/{transaction_id}", json={"amount": 1.239}, headers=auth_headers)
+    assert response.json()["amount"] == 1.24
+
+    response = client.get(f"/api/v1/transactions/{transaction_id}", headers=auth_headers)
+    assert response.json()["amount"] == 1.24
+
+
 def test_delete_transaction(auth_headers, test_category):
     """Тест удаления транзакции"""
     create_resp = client.post(
@@ -355,4 +375,394 @@ def test_transactions_different_users(auth_headers, test_category):
     assert response.status_code == 200
     data = response.json()
     assert len(data) == 1
-    assert data[0]["description"] == "Моя транзакция"
\ No newline at end of file
+    assert data[0]["description"] == "Моя транзакция"
+
+def test_get_transactions_keyset_pages(auth_headers, test_category):
+    """Тест постраничного списка: курсоры проходят все транзакции без пропусков и повторов"""
+    from datetime import datetime, timedelta
+
+    same_day = datetime(2026, 1, 15, 12, 0)
+    for i in range(7):
+        # Несколько транзакций с одинаковой датой — порядок между ними задаёт id
+        when = same_day if i < 3 else same_day - timedelta(days=i)
+        client.post(
+            "/api/v1/transactions/",
+            json={
+                "amount": 100 + i,
+                "description": f"Покупка {i}",
+                "category_id": test_category["id"],
+                "date": when.isoformat()
+            },
+            headers=auth_headers
+        )
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/transactions/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 3
+        seen += response.json()
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert pages == 3
+    assert len({t["id"] for t in seen}) == 7
+    assert [(t["date"], t["id"]) for t in seen] == sorted(((t["date"], t["id"]) for t in seen), reverse=True)
+
+
+def test_get_transactions_page_limits(auth_headers):
+    """Тест ограничений страницы и проверки курсора"""
+    response = client.get("/api/v1/transactions/", params={"limit": 100000}, headers=auth_headers)
+    assert response.status_code == 422
+
+    response = client.get("/api/v1/transactions/", params={"cursor": "not-a-cursor"}, headers=auth_headers)
+    assert response.status_code == 400
+
+    # Подделанный курсор правильной формы, но с чужими типами значений — 400, а не ошибка БД
+    tampered = [
+        ("-date", ["date", "id"], ["2026-01-01T00:00:00", "abc"]),
+        ("-date", ["date", "id"], [123, 1]),
+        ("-amount", ["amount", "id"], ["много", 1]),
+        ("-amount", ["amount", "id"], [10, 1.5]),
+    ]
+    for sort, columns, values in tampered:
+        raw = json.dumps({"k": columns, "v": values}).encode()
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        response = client.get("/api/v1/transactions/", params={"sort": sort, "cursor": cursor}, headers=auth_headers)
+        assert response.status_code == 400, values
+
+    raw = json.dumps({"k": ["rank", "id"], "v": [{"x": 1}, 1]}).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    response = client.get("/api/v1/transactions/search", params={"q": "кофе", "cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_get_transactions_combined_filters(auth_headers, test_category):
+    """Тест что все фильтры применяются вместе, а не по одному"""
+    other = client.post(
+        "/api/v1/categories/",
+        json={"name": "Транспорт", "type": "expense"},
+        headers=auth_headers
+    ).json()
+    salary = client.post(
+        "/api/v1/categories/",
+        json={"name": "Зарплата", "type": "income"},
+        headers=auth_headers
+    ).json()
+
+    for amount, description, category, day in [
+        (100, "Обед в кафе", test_category, 10),
+        (900, "Ужин в кафе", test_category, 11),
+        (150, "Taxi Uber", other, 11),
+        (120, "Кафе 50% скидка", test_category, 20),
+        (50000, "Зарплата", salary, 11),
+    ]:
+        client.post(
+            "/api/v1/transactions/",
+            json={
+                "amount": amount,
+                "description": description,
+                "category_id": category["id"],
+                "date": datetime(2026, 3, day, 15, 0).isoformat()
+            },
+            headers=auth_headers
+        )
+
+    def amounts(**params):
+        response = client.get("/api/v1/transactions/", params=params, headers=auth_headers)
+        assert response.status_code == 200
+        return [t["amount"] for t in response.json()]
+
+    # Только одна граница даты тоже работает; конец периода включается целиком
+    assert amounts(start_date="2026-03-11", sort="amount") == [120, 150, 900, 50000]
+    assert amounts(end_date="2026-03-11", sort="amount") == [100, 150, 900, 50000]
+    # Даты + категория одновременно
+    assert amounts(start_date="2026-03-11", end_date="2026-03-31", category_id=test_category["id"]) == [120, 900]
+    # Несколько категорий, диапазон сумм, поиск по описанию, тип
+    assert amounts(category_id=[test_category["id"], other["id"]], min_amount=110, max_amount=500,
+                   sort="-amount") == [150, 120]
+    assert amounts(q="в кафе", sort="amount") == [100, 900]
+    assert amounts(q="TAXI") == [150]
+    assert amounts(q="50%") == [120]
+    assert amounts(type="income") == [50000]
+
+    response = client.get("/api/v1/transactions/", params={"min_amount": 10, "max_amount": 5}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_get_transactions_sorted_pages(auth_headers, test_category):
+    """Тест курсора при сортировке по сумме"""
+    for amount in [300, 100, 200, 100, 400]:
+        client.post(
+            "/api/v1/transactions/",
+            json={"amount": amount, "description": "x", "category_id": test_category["id"]},
+            headers=auth_headers
+        )
+
+    first = client.get("/api/v1/transactions/", params={"sort": "amount", "limit": 3}, headers=auth_headers)
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/api/v1/transactions/", params={"sort": "amount", "limit": 3, "cursor": cursor},
+                        headers=auth_headers)
+    assert [t["amount"] for t in first.json() + second.json()] == [100, 100, 200, 300, 400]
+
+    # Курсор от другой сортировки не принимается
+    response = client.get("/api/v1/transactions/", params={"cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_search_transactions(auth_headers, test_category):
+    """Тест поиска по описанию: морфология, ранжирование, подстроки и курсор"""
+    for description in [
+        "Купил продукты",
+        "Продуктов много, продукты дорогие",
+        "Кофе с собой",
+        "Такси домой",
+        None,
+    ]:
+        client.post(
+            "/api/v1/transactions/",
+            json={"amount": 100, "description": description, "category_id": test_category["id"]},
+            headers=auth_headers
+        )
+
+    response = client.get("/api/v1/transactions/search", params={"q": "продукт"}, headers=auth_headers)
+    assert response.status_code == 200
+    # Обе формы слова найдены, более релевантная — первой
+    assert [t["description"] for t in response.json()] == ["Продуктов много, продукты дорогие", "Купил продукты"]
+
+    # Подстрока внутри слова — через ILIKE
+    response = client.get("/api/v1/transactions/search", params={"q": "офе"}, headers=auth_headers)
+    assert [t["description"] for t in response.json()] == ["Кофе с собой"]
+
+    first = client.get("/api/v1/transactions/search", params={"q": "продукты", "limit": 1}, headers=auth_headers)
+    second = client.get(
+        "/api/v1/transactions/search",
+        params={"q": "продукты", "limit": 1, "cursor": first.headers["X-Next-Cursor"]},
+        headers=auth_headers
+    )
+    assert [t["description"] for t in first.json() + second.json()] == [
+        "Продуктов много, продукты дорогие", "Купил продукты"
+    ]
+    assert "X-Next-Cursor" not in second.headers
+
+    response = client.get("/api/v1/transactions/search", params={"q": ""}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_create_transaction_foreign_category(auth_headers, test_category):
+    """Тест что нельзя записать транзакцию в чужую категорию"""
+    client.post("/api/v1/auth/register", json={
+        "username": "other",
+        "email": "other@example.com",
+        "password": "12345678"
+    })
+    token = client.post("/api/v1/auth/login", data={"username": "other", "password": "12345678"}).json()["access_token"]
+
+    response = client.post(
+        "/api/v1/transactions/",
+        json={"amount": 10, "description": "Чужая", "category_id": test_category["id"]},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
+
+
+def _other_user_headers():
+    client.post("/api/v1/auth/register", json={
+        "username": "other",
+        "email": "other@example.com",
+        "password": "12345678"
+    })
+    token = client.post("/api/v1/auth/login", data={"username": "other", "password": "12345678"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_transaction_batch(auth_headers, test_category):
+    """Тест пакета: создания, изменения и удаления вместе, результат по каждому элементу"""
+    from sqlalchemy import event
+    from app.core.database import engine
+
+    keep = client.post(
+        "/api/v1/transactions/",
+        json={"amount": 100, "description": "Старая", "category_id": test_category["id"]},
+        headers=auth_headers
+    ).json()
+    drop = client.post(
+        "/api/v1/transactions/",
+        json={"amount": 50, "description": "Удалить", "category_id": test_category["id"]},
+        headers=auth_headers
+    ).json()
+    other_headers = _other_user_headers()
+    foreign_category = client.post(
+        "/api/v1/categories/", json={"name": "Чужая", "type": "expense"}, headers=other_headers
+    ).json()
+
+    inserts = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO transactions"):
+            inserts.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        response = client.post("/api/v1/transactions/batch", json={
+            "create": [
+                {"amount": 10, "description": "Первая", "category_id": test_category["id"]},
+                {"amount": 20, "description": "Чужая", "category_id": foreign_category["id"]},
+                {"amount": 30, "description": "Третья", "category_id": test_category["id"]},
+            ],
+            "update": [{"id": keep["id"], "amount": 150}],
+            "delete": [drop["id"], keep["id"], 999999],
+        }, headers=auth_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["error"] for item in data["created"]] == [None, "Category not found", None]
+    assert data["created"][1]["id"] is None
+    assert data["updated"] == [{"index": 0, "id": keep["id"], "error": None}]
+    assert [item["error"] for item in data["deleted"]] == [
+        None, "Duplicate transaction id in batch", "Transaction not found"
+    ]
+    # Все вставки пакета — один INSERT
+    assert len(inserts) == 1
+
+    response = client.get("/api/v1/transactions/", params={"sort": "amount"}, headers=auth_headers)
+    transactions = response.json()
+    assert [(t["id"], t["amount"]) for t in transactions] == [
+        (data["created"][0]["id"], 10), (data["created"][2]["id"], 30), (keep["id"], 150)
+    ]
+
+    # Свёртка и кэш аналитики обновлены вместе с пакетом
+    balance = client.get("/api/v1/analytics/balance", headers=auth_headers).json()
+    assert balance["total_expense"] == 190
+    now = datetime.now()
+    monthly = client.get(f"/api/v1/analytics/monthly/{now.year}/{now.month}", headers=auth_headers).json()
+    assert monthly["by_category"] == {"Еда": 190}
+
+
+def test_transaction_batch_foreign_transactions(auth_headers, test_category):
+    """Тест что пакет не трогает чужие транзакции"""
+    own = client.post(
+        "/api/v1/transactions/",
+        json={"amount": 100, "description": "Своя", "category_id": test_category["id"]},
+        headers=auth_headers
+    ).json()
+
+    response = client.post("/api/v1/transactions/batch", json={
+        "update": [{"id": own["id"], "amount": 1}],
+        "delete": [own["id"]],
+    }, headers=_other_user_headers())
+    assert response.status_code == 200
+    assert response.json()["updated"][0]["error"] == "Transaction not found"
+    assert response.json()["deleted"][0]["error"] == "Transaction not found"
+
+    response = client.get(f"/api/v1/transactions/{own['id']}", headers=auth_headers)
+    assert response.json()["amount"] == 100
+
+
+def test_transaction_batch_limits(auth_headers, test_category):
+    """Тест валидации пакета целиком"""
+    from app.core.config import settings
+
+    response = client.post("/api/v1/transactions/batch", json={
+        "delete": list(range(1, settings.TRANSACTION_BATCH_MAX + 2))
+    }, headers=auth_headers)
+    assert response.status_code == 422
+
+    response = client.post("/api/v1/transactions/batch", json={
+        "create": [{"amount": -5, "category_id": test_category["id"]}]
+    }, headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_create_transaction_without_refresh(auth_headers, test_category, query_counter):
+    """Тест что создание транзакции не перечитывает её SELECT-ом: всё приходит из RETURNING"""
+    query_counter.reset()
+    response = client.post(
+        "/api/v1/transactions/",
+        json={"amount": 10, "description": "Кофе", "category_id": test_category["id"]},
+        headers=auth_headers
+    )
+
+    assert response.status_code == 200
+    assert response.json()["date"] is not None
+    assert not [s for s in query_counter.statements if s.startswith("SELECT")]
+    assert len(query_counter.matching("INSERT INTO transactions")) == 1
+
+    # tsvector описания не гоняется обратно ни при создании, ни при изменении
+    client.put(f"/api/v1/transactions/{response.json()['id']}", json={"description": "Чай"}, headers=auth_headers)
+    assert not query_counter.matching("search_vector")
+
+
+def test_unit_of_work_nested(test_category):
+    """Тест что вложенные блоки коммитят один раз в конце внешнего, а ошибка откатывает всё"""
+    from app.repositories.transaction_repository import TransactionRepository
+    from app.repositories.unit_of_work import unit_of_work, in_unit_of_work
+    from app.models.enums import TransactionType
+
+    def count():
+        check = SessionLocal()
+        try:
+            return check.query(Transaction).count()
+        finally:
+            check.close()
+
+    db = SessionLocal()
+    try:
+        repository = TransactionRepository(db)
+        row = dict(amount=1, category_id=test_category["id"], user_id=test_category["user_id"],
+                   type=TransactionType.EXPENSE)
+
+        with unit_of_work(db):
+            repository.create(**row)
+            with unit_of_work(db):
+                repository.create(**row)
+            # Вложенные create ничего не закоммитили
+            assert count() == 0
+        assert count() == 2
+        assert not in_unit_of_work(db)
+
+        with pytest.raises(RuntimeError):
+            with unit_of_work(db):
+                repository.create(**row)
+                raise RuntimeError
+        assert count() == 2
+    finally:
+        db.close()
+
+
+def test_transaction_category_loading(auth_headers, test_category, query_counter):
+    """Тест что связи грузятся только явно: без опции — ошибка, с selectinload — один запрос на всю страницу"""
+    from sqlalchemy.exc import InvalidRequestError
+    from sqlalchemy.orm import selectinload
+    from app.repositories.transaction_repository import TransactionQuery, TransactionRepository
+
+    for i in range(5):
+        client.post(
+            "/api/v1/transactions/",
+            json={"amount": 10 + i, "description": f"T{i}", "category_id": test_category["id"]},
+            headers=auth_headers
+        )
+
+    db = SessionLocal()
+    try:
+        repository = TransactionRepository(db)
+        query = TransactionQuery(test_category["user_id"])
+
+        page = repository.find(query, limit=10)
+        with pytest.raises(InvalidRequestError):
+            page.items[0].category
+
+        db.expunge_all()
+        query_counter.reset()
+        page = repository.find(query, limit=10, options=[selectinload(Transaction.category)])
+        assert {t.category.name for t in page.items} == {"Еда"}
+        assert query_counter.count == 2
+    finally:
+        db.close()